@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Follow
+from .utils import invalidate_friend_ids
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def invalidate_friend_ids_on_follow_change(sender, instance, **kwargs):
+    # La relation compte pour les deux utilisateurs
+    invalidate_friend_ids(instance.follower_id, instance.following_id)
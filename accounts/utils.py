@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.db import transaction
+
+
+FRIEND_IDS_CACHE_TTL = 300  # secondes
+
+
+def friend_ids_cache_key(user_id):
+    return f"friends:{user_id}"
+
+
+def get_friend_ids(user):
+    """
+    Ids des complices d'un utilisateur (suivis + followers), en cache par utilisateur.
+    Stocke une simple liste d'entiers ; invalidée par les signaux de Follow.
+    """
+    key = friend_ids_cache_key(user.id)
+    friend_ids = cache.get(key)
+    if friend_ids is None:
+        from .models import Follow
+
+        # Une seule requête UNION : Postgres dédoublonne les deux sens de la relation,
+        # chaque branche utilisant son propre index (follower_id / following_id)
+        friend_ids = list(
+            Follow.objects.filter(follower=user).order_by().values_list('following_id', flat=True).union(
+                Follow.objects.filter(following=user).order_by().values_list('follower_id', flat=True)
+            )
+        )
+        cache.set(key, friend_ids, FRIEND_IDS_CACHE_TTL)
+    return friend_ids
+
+
+def invalidate_friend_ids(*user_ids):
+    cache.delete_many([friend_ids_cache_key(user_id) for user_id in user_ids])
+
+
+def _get_http_request(request):
+    # Une Request DRF enveloppe la HttpRequest Django vue par le middleware
+    return getattr(request, '_request', request)
+
+
+def queue_notification(request, **fields):
+    """
+    Mettre en file une notification pour la requête courante.
+    NotificationBufferMiddleware les insère toutes en un seul bulk_create après une
+    réponse réussie ; hors middleware (shell, tâche), repli sur un INSERT au commit.
+    """
+    from .models import Notification
+
+    notification = Notification(**fields)
+    buffer = getattr(_get_http_request(request), '_notification_buffer', None)
+    if buffer is None:
+        transaction.on_commit(notification.save)
+        return
+    buffer.append(notification)
+
+
+def flush_notifications(request):
+    """Insérer en une requête les notifications mises en file pendant la requête."""
+    from .models import Notification
+
+    http_request = _get_http_request(request)
+    buffer = getattr(http_request, '_notification_buffer', None)
+    if buffer:
+        Notification.objects.bulk_create(buffer, batch_size=500)
+    http_request._notification_buffer = []
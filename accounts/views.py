@@ -7,9 +7,10 @@ from django.contrib.auth import get_user_model
 from django.db.models import Q, F
 from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank, TrigramSimilarity
 from django.conf import settings
-import uuid
+import secrets
 from .serializers import UserRegistrationSerializer, UserSerializer, LoginSerializer, NotificationSerializer
 from .models import Follow, Notification
+from .utils import queue_notification
 from recipes.models import Recipe
 from recipes.serializers import RecipeSerializer
 from savr_back.settings import build_s3_client, build_presigned_get_url, build_s3_url
@@ -86,7 +87,7 @@ def upload_avatar_view(request):
             )
         
         # Générer un nom de fichier unique pour l'avatar
-        unique_id = str(uuid.uuid4()).replace('-', '')
+        unique_id = secrets.token_hex(16)
         file_name = f"avatars/{request.user.id}/{unique_id}.jpg"
         
         # Générer l'URL pré-signée pour l'upload (valide 5 minutes)
@@ -275,7 +276,8 @@ def follow_user_view(request, user_id):
         )
         if created:
             # Créer une notification pour l'utilisateur suivi
-            Notification.objects.create(
+            queue_notification(
+                request,
                 user=target_user,
                 notification_type='follow',
                 title='Nouvel ami',
@@ -0,0 +1,27 @@
+# Generated manually
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0042_remove_mealplan_recipe'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+            reverse_sql=migrations.RunSQL.noop
+        ),
+        # Index GIN trigram sur le nom des ingrédients : sert les ILIKE 'q%' (autocomplete)
+        # comme les recherches par sous-chaîne, sans scan séquentiel de la table
+        migrations.RunSQL(
+            sql="""
+                CREATE INDEX IF NOT EXISTS recipes_ingredient_name_trgm_idx 
+                ON recipes_ingredient 
+                USING gin(name gin_trgm_ops);
+            """,
+            reverse_sql="DROP INDEX IF EXISTS recipes_ingredient_name_trgm_idx;"
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-16 12:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0043_add_ingredient_name_trgm_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mealplan',
+            name='meal_time_rank',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(meal_time='lunch', then=models.Value(0)), models.When(meal_time='dinner', then=models.Value(1)), default=models.Value(2)), output_field=models.IntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='mealplan',
+            index=models.Index(fields=['user', 'date', 'meal_time_rank'], name='mealplan_user_date_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated manually
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY ne peut pas s'exécuter dans une transaction
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0044_mealplan_meal_time_rank'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='postphoto',
+            index=models.Index(fields=['post', 'photo_type'], name='postphoto_post_type_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='postphoto',
+            index=models.Index(fields=['recipe_batch', 'photo_type'], name='postphoto_batch_type_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated manually
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE/DROP INDEX CONCURRENTLY ne peuvent pas s'exécuter dans une transaction
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0045_postphoto_type_indexes'),
+    ]
+
+    operations = [
+        # Index du fil paginé par curseur (is_published, -created_at, -id) ;
+        # il couvre l'ancien index (is_published, -created_at)
+        AddIndexConcurrently(
+            model_name='post',
+            index=models.Index(fields=['is_published', '-created_at', '-id'], name='post_published_cursor_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='post',
+            name='post_published_created_idx',
+        ),
+    ]
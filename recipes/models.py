@@ -324,6 +324,16 @@ class MealPlan(models.Model):
         default=0,
         help_text="Nombre d'invités anonymes (sans compte) pour ce repas"
     )
+    # Rang de tri du repas dans la journée (lunch avant dinner), calculé et stocké par PostgreSQL
+    meal_time_rank = models.GeneratedField(
+        expression=models.Case(
+            models.When(meal_time='lunch', then=models.Value(0)),
+            models.When(meal_time='dinner', then=models.Value(1)),
+            default=models.Value(2),
+        ),
+        output_field=models.IntegerField(),
+        db_persist=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -333,6 +343,7 @@ class MealPlan(models.Model):
         indexes = [
             models.Index(fields=['user', 'date'], name='mealplan_user_date_idx'),
             models.Index(fields=['user', 'meal_time'], name='mealplan_user_meal_time_idx'),
+            models.Index(fields=['user', 'date', 'meal_time_rank'], name='mealplan_user_date_rank_idx'),
         ]
     
     def get_group_key(self):
@@ -590,7 +601,7 @@ class Post(models.Model):
         indexes = [
             models.Index(fields=['user', 'is_published'], name='post_user_published_idx'),
             models.Index(fields=['recipe_batch'], name='post_recipebatch_idx'),
-            models.Index(fields=['is_published', '-created_at'], name='post_published_created_idx'),
+            models.Index(fields=['is_published', '-created_at', '-id'], name='post_published_cursor_idx'),
         ]
     
     def __str__(self):
@@ -675,6 +686,10 @@ class PostPhoto(models.Model):
     
     class Meta:
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['post', 'photo_type'], name='postphoto_post_type_idx'),
+            models.Index(fields=['recipe_batch', 'photo_type'], name='postphoto_batch_type_idx'),
+        ]
         # Un seul photo de chaque type par post ou batch (sauf spontaneous)
         constraints = [
             models.UniqueConstraint(
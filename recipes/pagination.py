@@ -1,4 +1,4 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class CustomPageNumberPagination(PageNumberPagination):
@@ -11,3 +11,21 @@ class CustomPageNumberPagination(PageNumberPagination):
     max_page_size = 100  # Limite maximale pour éviter les abus
 
 
+class MealPlanPageNumberPagination(CustomPageNumberPagination):
+    """
+    Pagination des meal plans : une plage de dates large reste bornée en nombre
+    de meal plans sérialisés (avec recettes, invitations et groupedDates) par requête.
+    """
+    page_size = 50
+    max_page_size = 200
+
+
+class PostCursorPagination(CursorPagination):
+    """
+    Pagination par curseur du fil des posts : coût constant quelle que soit la
+    profondeur de défilement (pas d'OFFSET), tri stable grâce à l'id.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
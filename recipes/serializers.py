@@ -1,5 +1,7 @@
+import copy
+import logging
+
 from rest_framework import serializers
-from django.conf import settings
 from django.db import models
 from .models import (
     Category,
@@ -25,10 +27,32 @@ from .models import (
 )
 from django.contrib.auth import get_user_model
 from django.db.models import Q
-from .utils import get_accessible_meal_plan_filter
+from .utils import (
+    get_accessible_meal_plan_filter, get_batch_dates_map, invalidate_meal_plan_cache,
+    with_active_invitations_count, get_active_invitations_count, invalidate_batch_servings_cache,
+)
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
 
-class UserLightSerializer(serializers.ModelSerializer):
+class CachedFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer dont get_fields() (introspection du modèle, build_field) n'est calculé
+    qu'une fois par classe. Chaque instance reçoit une copie profonde des champs, comme DRF
+    le fait déjà pour les champs déclarés : aucun champ lié n'est partagé entre requêtes.
+    À réserver aux serializers dont les champs ne dépendent ni du contexte ni de l'instance.
+    """
+    _fields_cache = {}
+    
+    def get_fields(self):
+        cls = type(self)
+        fields = self._fields_cache.get(cls)
+        if fields is None:
+            fields = self._fields_cache[cls] = super().get_fields()
+        return copy.deepcopy(fields)
+
+
+class UserLightSerializer(CachedFieldsModelSerializer):
     avatar_url = serializers.SerializerMethodField()
     
     class Meta:
@@ -252,7 +276,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         return recipe
 
 
-class RecipeLightSerializer(serializers.ModelSerializer):
+class RecipeLightSerializer(CachedFieldsModelSerializer):
     meal_type_display = serializers.CharField(source='get_meal_type_display', read_only=True)
     difficulty_display = serializers.CharField(source='get_difficulty_display', read_only=True)
     image_url = serializers.SerializerMethodField()
@@ -265,7 +289,7 @@ class RecipeLightSerializer(serializers.ModelSerializer):
         return obj.image_url
 
 
-class RecipeBatchLightSerializer(serializers.ModelSerializer):
+class RecipeBatchLightSerializer(CachedFieldsModelSerializer):
     recipe = RecipeLightSerializer(read_only=True)
     created_by = UserLightSerializer(read_only=True)
     total_servings_batch = serializers.IntegerField(read_only=True)
@@ -312,6 +336,53 @@ class RecipeBatchSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
+def get_cached_batch_dates(serializer, batch_id):
+    """
+    Dates des meal plans d'un batch pour groupedDates.
+    La vue peut précharger context['batch_dates'] (get_batch_dates_map) pour toute la page ;
+    sinon les batches manquants sont chargés une fois et mémorisés dans le contexte partagé.
+    """
+    batch_dates = serializer.context.setdefault('batch_dates', {})
+    if batch_id not in batch_dates:
+        batch_dates.update(get_batch_dates_map([batch_id]))
+    return batch_dates[batch_id]
+
+
+# Priorité des statuts pour dédupliquer les participants : accepted > pending > declined
+PARTICIPANT_STATUS_RANK = {'accepted': 3, 'pending': 2, 'declined': 1}
+ACTIVE_PARTICIPANT_STATUSES = frozenset(('accepted', 'pending'))
+
+
+def get_participant_user_data(serializer, user):
+    """
+    Données UserLightSerializer d'un participant, internées dans le contexte partagé
+    (context['participants_catalog']) : un complice présent sur plusieurs repas n'est
+    sérialisé qu'une fois (URL d'avatar pré-signée comprise) et partage le même dict.
+    """
+    catalog = serializer.context.setdefault('participants_catalog', {})
+    data = catalog.get(user.id)
+    if data is None:
+        data = catalog[user.id] = UserLightSerializer(user, context=serializer.context).data
+    return data
+
+
+def dedupe_participants(serializer, participants):
+    """
+    Un participant par utilisateur (meilleur statut conservé), dans l'ordre de première apparition.
+    participants : itérable de (user, status). Seuls les gagnants sont sérialisés.
+    """
+    best_by_user_id = {}
+    for user, status in participants:
+        rank = PARTICIPANT_STATUS_RANK.get(status, 0)
+        current = best_by_user_id.get(user.id)
+        if current is None or rank > current[0]:
+            best_by_user_id[user.id] = (rank, user, status)
+    return [
+        {'user': get_participant_user_data(serializer, user), 'status': status}
+        for _, user, status in best_by_user_id.values()
+    ]
+
+
 class MealPlanRecipeSerializer(serializers.ModelSerializer):
     """
     Serializer pour la relation MealPlan-RecipeBatch avec ratio.
@@ -354,11 +425,8 @@ class MealPlanRecipeSerializer(serializers.ModelSerializer):
         """Dates de tous les meal plans liés au même batch."""
         if not obj.recipe_batch_id:
             return [obj.meal_plan.date.isoformat()]
-        meal_plans = MealPlan.objects.filter(
-            meal_plan_recipe_batches__recipe_batch_id=obj.recipe_batch_id
-        ).distinct().order_by('date', 'meal_time')
-        dates = [mp.date.isoformat() for mp in meal_plans]
-        return dates or [obj.meal_plan.date.isoformat()]
+        dates = get_cached_batch_dates(self, obj.recipe_batch_id)
+        return list(dates) or [obj.meal_plan.date.isoformat()]
 
 
 class MealPlanDetailSerializer(serializers.ModelSerializer):
@@ -388,56 +456,34 @@ class MealPlanDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'participants', 'created_at', 'updated_at']
     
     def get_participants(self, obj):
-        from .models import MealInvitation
-        invitations = obj.invitations.all() if hasattr(obj, 'invitations') else MealInvitation.objects.filter(meal_plan=obj).select_related('invitee')
-        # Log pour debug (uniquement en mode DEBUG)
-        if settings.DEBUG:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.debug(f"[MealPlanDetailSerializer] get_participants for meal plan {obj.id}: {len(invitations)} invitations")
+        # Les vues préchargent toujours invitations (+ invitee) : lecture du cache
+        invitations = obj.invitations.all()
+        # Log pour debug : formatage et boucle uniquement si le niveau DEBUG est actif
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "[MealPlanDetailSerializer] get_participants for meal plan %s: %d invitations",
+                obj.id, len(invitations),
+            )
             for inv in invitations:
-                logger.debug(f"  - Invitation {inv.id}: user_id={inv.invitee_id}, status={inv.status}")
+                logger.debug("  - Invitation %s: user_id=%s, status=%s", inv.id, inv.invitee_id, inv.status)
         return [
             {
-                'user': UserLightSerializer(inv.invitee, context=self.context).data,
+                'user': get_participant_user_data(self, inv.invitee),
                 'status': inv.status
             }
             for inv in invitations
         ]
     
     def get_total_guest_count(self, obj: MealPlan):
-        if hasattr(obj, '_total_guest_count'):
-            return obj._total_guest_count
         return obj.guest_count or 0
     
     def get_total_participants(self, obj: MealPlan):
-        if hasattr(obj, '_total_participants'):
-            precedence = {'accepted': 3, 'pending': 2, 'declined': 1}
-            by_user_id = {}
-            for p in obj._total_participants:
-                uid = p['user'].id
-                existing = by_user_id.get(uid)
-                if not existing or precedence.get(p['status'], 0) > precedence.get(existing['status'], 0):
-                    by_user_id[uid] = {
-                        'user': UserLightSerializer(p['user'], context=self.context).data,
-                        'status': p['status'],
-                    }
-            return list(by_user_id.values())
         return self.get_participants(obj)
     
     def get_total_servings(self, obj: MealPlan):
-        if hasattr(obj, '_total_servings'):
-            return obj._total_servings
-        
-        participants_to_use = None
-        if hasattr(obj, '_total_participants'):
-            participants_to_use = obj._total_participants
-        else:
-            participants_to_use = self.get_participants(obj)
-        
         active_participants_count = sum(
-            1 for p in participants_to_use
-            if isinstance(p, dict) and p.get('status') in ['accepted', 'pending']
+            1 for p in self.get_participants(obj)
+            if p['status'] in ACTIVE_PARTICIPANT_STATUSES
         )
         
         guest_count_to_use = self.get_total_guest_count(obj)
@@ -448,13 +494,12 @@ class MealPlanDetailSerializer(serializers.ModelSerializer):
         dates = set()
         for mprb in obj.meal_plan_recipe_batches.all():
             if mprb.recipe_batch_id:
-                for mp in MealPlan.objects.filter(meal_plan_recipe_batches__recipe_batch_id=mprb.recipe_batch_id):
-                    dates.add(mp.date.isoformat())
+                dates.update(get_cached_batch_dates(self, mprb.recipe_batch_id))
             else:
                 dates.add(obj.date.isoformat())
         return sorted(list(dates)) if dates else [obj.date.isoformat()]
     
-class MealPlanSerializer(serializers.ModelSerializer):
+class MealPlanSerializer(CachedFieldsModelSerializer):
     recipe = RecipeSerializer(read_only=True)  # Garder pour compatibilité (utilisé pour create/update)
     recipe_id = serializers.PrimaryKeyRelatedField(
         queryset=Recipe.objects.all(),
@@ -517,6 +562,31 @@ class MealPlanSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['user', 'participants', 'created_at', 'updated_at', 'recipes', 'recipe']
     
+    def _bulk_link_batches(self, meal_plan, links):
+        """
+        Associer des batches au meal plan en deux INSERT multi-lignes au plus.
+        links: liste de (batch_id, recipe_id, ratio, order) ; si batch_id est None,
+        un RecipeBatch est créé à la volée pour recipe_id.
+        """
+        new_batches = RecipeBatch.objects.bulk_create([
+            RecipeBatch(recipe_id=recipe_id, created_by=meal_plan.user)
+            for batch_id, recipe_id, _ratio, _order in links
+            if not batch_id
+        ])
+        new_batch_ids = iter(batch.id for batch in new_batches)
+        MealPlanRecipeBatch.objects.bulk_create([
+            MealPlanRecipeBatch(
+                meal_plan=meal_plan,
+                recipe_batch_id=batch_id or next(new_batch_ids),
+                ratio=ratio,
+                order=order,
+            )
+            for batch_id, _recipe_id, ratio, order in links
+        ])
+        # bulk_create n'émet pas post_save : invalider explicitement les caches
+        invalidate_meal_plan_cache(meal_plan.user_id)
+        invalidate_batch_servings_cache([batch_id for batch_id, _recipe_id, _ratio, _order in links])
+    
     def validate(self, attrs):
         # Si update partiel avec entries/recipe_ids/batch_ids, ne pas exiger date/meal_time/meal_type
         if self.instance and ('recipe_ids' in attrs or 'batch_ids' in attrs or 'entries' in attrs):
@@ -540,6 +610,7 @@ class MealPlanSerializer(serializers.ModelSerializer):
         # Nouveau payload unifié
         if entries:
             from decimal import Decimal, ROUND_HALF_UP
+            links = []
             for order, item in enumerate(entries):
                 recipe_id = item.get('recipe_id')
                 batch_id = item.get('batch_id')
@@ -547,46 +618,29 @@ class MealPlanSerializer(serializers.ModelSerializer):
                 order_value = item.get('order', order)
                 ratio_decimal = Decimal(str(ratio_value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
                 if batch_id:
-                    MealPlanRecipeBatch.objects.create(
-                        meal_plan=meal_plan,
-                        recipe_batch_id=batch_id,
-                        ratio=ratio_decimal,
-                        order=order_value
-                    )
+                    links.append((batch_id, None, ratio_decimal, order_value))
                 elif recipe_id:
-                    batch = RecipeBatch.objects.create(recipe_id=recipe_id, created_by=meal_plan.user)
-                    MealPlanRecipeBatch.objects.create(
-                        meal_plan=meal_plan,
-                        recipe_batch=batch,
-                        ratio=ratio_decimal,
-                        order=order_value
-                    )
+                    links.append((None, recipe_id, ratio_decimal, order_value))
+            self._bulk_link_batches(meal_plan, links)
             return meal_plan
         
         # Si batch_ids est fourni, on associe uniquement ces batches
         if batch_ids:
-            for order, batch_id in enumerate(batch_ids):
-                MealPlanRecipeBatch.objects.create(
-                    meal_plan=meal_plan,
-                    recipe_batch_id=batch_id,
-                    ratio=Decimal('1.00'),
-                    order=order
-                )
+            self._bulk_link_batches(meal_plan, [
+                (batch_id, None, Decimal('1.00'), order)
+                for order, batch_id in enumerate(batch_ids)
+            ])
             return meal_plan
         
         # Sinon, compat : créer des batches à la volée depuis des recettes
         if recipe_ids:
             default_ratio = Decimal('1.0') / Decimal(str(len(recipe_ids)))
+            links = []
             for order, recipe_id in enumerate(recipe_ids):
                 ratio_value = recipe_ratios.get(str(recipe_id), recipe_ratios.get(recipe_id, default_ratio))
                 ratio_decimal = Decimal(str(ratio_value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-                batch = RecipeBatch.objects.create(recipe_id=recipe_id, created_by=meal_plan.user)
-                MealPlanRecipeBatch.objects.create(
-                    meal_plan=meal_plan,
-                    recipe_batch=batch,
-                    ratio=ratio_decimal,
-                    order=order
-                )
+                links.append((None, recipe_id, ratio_decimal, order))
+            self._bulk_link_batches(meal_plan, links)
         
         return meal_plan
     
@@ -606,6 +660,7 @@ class MealPlanSerializer(serializers.ModelSerializer):
         if entries is not None:
             from decimal import Decimal, ROUND_HALF_UP
             meal_plan.meal_plan_recipe_batches.all().delete()
+            links = []
             for order, item in enumerate(entries):
                 recipe_id = item.get('recipe_id')
                 batch_id = item.get('batch_id')
@@ -613,49 +668,32 @@ class MealPlanSerializer(serializers.ModelSerializer):
                 order_value = item.get('order', order)
                 ratio_decimal = Decimal(str(ratio_value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
                 if batch_id:
-                    MealPlanRecipeBatch.objects.create(
-                        meal_plan=meal_plan,
-                        recipe_batch_id=batch_id,
-                        ratio=ratio_decimal,
-                        order=order_value
-                    )
+                    links.append((batch_id, None, ratio_decimal, order_value))
                 elif recipe_id:
-                    batch = RecipeBatch.objects.create(recipe_id=recipe_id, created_by=meal_plan.user)
-                    MealPlanRecipeBatch.objects.create(
-                        meal_plan=meal_plan,
-                        recipe_batch=batch,
-                        ratio=ratio_decimal,
-                        order=order_value
-                    )
+                    links.append((None, recipe_id, ratio_decimal, order_value))
+            self._bulk_link_batches(meal_plan, links)
             return meal_plan
         
         # Si batch_ids est fourni explicitement, on remplace les liens par ces batches
         if batch_ids is not None:
             meal_plan.meal_plan_recipe_batches.all().delete()
             if len(batch_ids) > 0:
-                for order, batch_id in enumerate(batch_ids):
-                    MealPlanRecipeBatch.objects.create(
-                        meal_plan=meal_plan,
-                        recipe_batch_id=batch_id,
-                        ratio=Decimal('1.00'),
-                        order=order
-                    )
+                self._bulk_link_batches(meal_plan, [
+                    (batch_id, None, Decimal('1.00'), order)
+                    for order, batch_id in enumerate(batch_ids)
+                ])
             return meal_plan
         
         # Sinon, compat: handle recipe_ids en créant des batches
         if recipe_ids is not None:
             meal_plan.meal_plan_recipe_batches.all().delete()
             default_ratio = Decimal('1.0') / Decimal(str(len(recipe_ids))) if recipe_ids else Decimal('1.0')
+            links = []
             for order, recipe_id in enumerate(recipe_ids):
                 ratio_value = recipe_ratios.get(str(recipe_id)) or recipe_ratios.get(recipe_id) or default_ratio
                 ratio_decimal = Decimal(str(ratio_value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-                batch = RecipeBatch.objects.create(recipe_id=recipe_id, created_by=meal_plan.user)
-                MealPlanRecipeBatch.objects.create(
-                    meal_plan=meal_plan,
-                    recipe_batch=batch,
-                    ratio=ratio_decimal,
-                    order=order
-                )
+                links.append((None, recipe_id, ratio_decimal, order))
+            self._bulk_link_batches(meal_plan, links)
         
         return meal_plan
 
@@ -672,46 +710,22 @@ class MealPlanSerializer(serializers.ModelSerializer):
         return entries
     
     def get_participants(self, obj):
-        from .models import MealInvitation
-        # Utiliser le prefetch si disponible (via Prefetch), sinon faire une requête
-        # obj.invitations.all() utilisera automatiquement le cache si prefetch est fait
-        invitations = obj.invitations.all() if hasattr(obj, 'invitations') else MealInvitation.objects.filter(meal_plan=obj).select_related('invitee')
+        # obj.invitations.all() utilise le cache quand le prefetch est fait
+        invitations = obj.invitations.all()
         return [
             {
-                'user': UserLightSerializer(inv.invitee, context=self.context).data,
+                'user': get_participant_user_data(self, inv.invitee),
                 'status': inv.status
             }
             for inv in invitations
         ]
     
     def get_total_guest_count(self, obj: MealPlan):
-        """
-        Retourne le total_guest_count pré-calculé si disponible.
-        Sinon retourne simplement guest_count (meal plan non groupé).
-        """
-        if hasattr(obj, '_total_guest_count'):
-            return obj._total_guest_count
+        """Nombre d'invités hors application du meal plan (guest_count)."""
         return obj.guest_count or 0
     
     def get_total_participants(self, obj: MealPlan):
-        """
-        Retourne les participants groupés pré-calculés si disponibles.
-        Sinon retourne les participants du meal plan individuel.
-        """
-        if hasattr(obj, '_total_participants'):
-            precedence = {'accepted': 3, 'pending': 2, 'declined': 1}
-            by_user_id = {}
-            for p in obj._total_participants:
-                uid = p['user'].id
-                existing = by_user_id.get(uid)
-                if not existing or precedence.get(p['status'], 0) > precedence.get(existing['status'], 0):
-                    by_user_id[uid] = {
-                        'user': UserLightSerializer(p['user'], context=self.context).data,
-                        'status': p['status'],
-                    }
-            return list(by_user_id.values())
-        
-        # Fallback : utiliser get_participants normal
+        """Participants du meal plan (invitations dédupliquées)."""
         return self.get_participants(obj)
     
     def _calculate_recipe_group_servings(self, meal_plan_recipe_batch):
@@ -722,18 +736,13 @@ class MealPlanSerializer(serializers.ModelSerializer):
         batch_id = meal_plan_recipe_batch.recipe_batch_id
         if not batch_id:
             meal_plan = meal_plan_recipe_batch.meal_plan
-            participants = meal_plan.invitations.filter(status__in=['accepted', 'pending']).count()
-            return 1 + participants + (meal_plan.guest_count or 0)
+            return 1 + get_active_invitations_count(meal_plan) + (meal_plan.guest_count or 0)
         
-        total_servings = 0
-        seen_meal_plans = set()
-        for mp in MealPlan.objects.filter(meal_plan_recipe_batches__recipe_batch_id=batch_id).distinct():
-            if mp.id in seen_meal_plans:
-                continue
-            seen_meal_plans.add(mp.id)
-            participants = mp.invitations.filter(status__in=['accepted', 'pending']).count()
-            total_servings += 1 + participants + (mp.guest_count or 0)
-        return total_servings
+        # Une ligne par meal plan lié (unique meal_plan/batch), invitations actives comptées en SQL
+        rows = with_active_invitations_count(
+            MealPlan.objects.filter(meal_plan_recipe_batches__recipe_batch_id=batch_id)
+        ).values_list('guest_count', 'active_invitations')
+        return sum(1 + active_invitations + (guest_count or 0) for guest_count, active_invitations in rows)
     
     def get_total_servings(self, obj: MealPlan):
         """
@@ -741,16 +750,12 @@ class MealPlanSerializer(serializers.ModelSerializer):
         Pour un meal plan avec plusieurs recettes : somme des servings de chaque recette
         (groupée ou non).
         """
-        # Si on a un total_servings pré-calculé, l'utiliser
-        if hasattr(obj, '_total_servings'):
-            return obj._total_servings
-        
         # Calculer en sommant les servings de chaque recette
-        meal_plan_recipes = obj.meal_plan_recipe_batches.all()
-        if not meal_plan_recipes.exists():
+        # (liste : une seule requête sans prefetch, aucune avec, au lieu d'un EXISTS puis d'un SELECT)
+        meal_plan_recipes = list(obj.meal_plan_recipe_batches.all())
+        if not meal_plan_recipes:
             # Pas de recettes : calculer pour le meal plan seul
-            participants = obj.invitations.filter(status__in=['accepted', 'pending']).count()
-            return 1 + participants + (obj.guest_count or 0)
+            return 1 + get_active_invitations_count(obj) + (obj.guest_count or 0)
         
         # Pour chaque recette, calculer ses servings (groupée ou non)
         total_servings = 0
@@ -781,8 +786,7 @@ class MealPlanListSerializer(serializers.ModelSerializer):
         dates = set()
         for mprb in obj.meal_plan_recipe_batches.all():
             if mprb.recipe_batch_id:
-                for mp in MealPlan.objects.filter(meal_plan_recipe_batches__recipe_batch_id=mprb.recipe_batch_id):
-                    dates.add(mp.date.isoformat())
+                dates.update(get_cached_batch_dates(self, mprb.recipe_batch_id))
             else:
                 dates.add(obj.date.isoformat())
         return sorted(list(dates)) if dates else [obj.date.isoformat()]
@@ -833,72 +837,26 @@ class MealPlanRangeListSerializer(serializers.ModelSerializer):
         ]
     
     def get_total_guest_count(self, obj: MealPlan):
-        """
-        Retourne le total_guest_count pré-calculé si disponible.
-        Sinon retourne simplement guest_count (meal plan non groupé).
-        """
-        if hasattr(obj, '_total_guest_count'):
-            return obj._total_guest_count
+        """Nombre d'invités hors application du meal plan (guest_count)."""
         return obj.guest_count or 0
     
     def get_total_participants(self, obj: MealPlan):
-        """
-        Retourne les participants groupés pré-calculés si disponibles.
-        Sinon retourne une liste vide (meal plan non groupé).
-        """
-        if hasattr(obj, '_total_participants'):
-            precedence = {'accepted': 3, 'pending': 2, 'declined': 1}
-            by_user_id = {}
-            for p in obj._total_participants:
-                uid = p['user'].id
-                existing = by_user_id.get(uid)
-                if not existing or precedence.get(p['status'], 0) > precedence.get(existing['status'], 0):
-                    by_user_id[uid] = {
-                        'user': UserLightSerializer(p['user'], context=self.context).data,
-                        'status': p['status'],
-                    }
-            return list(by_user_id.values())
-        
-        # Fallback : retourner une liste vide pour les meal plans non groupés
+        """MealPlanRangeListSerializer ne charge pas les invitations : liste vide."""
         return []
     
     def get_total_servings(self, obj: MealPlan):
         """
         Calcule le nombre total de personnes pour ce meal plan.
-        Pour un meal plan simple : 1 + participants actifs + guest_count
-        Pour un meal plan groupé : utilise _total_servings pré-calculé
+        MealPlanRangeListSerializer ne charge pas les participants : 1 + guest_count.
         """
-        # Si on a un total_servings pré-calculé (meal plan groupé), l'utiliser
-        if hasattr(obj, '_total_servings'):
-            return obj._total_servings
-        
-        # Sinon, calculer pour un meal plan simple
-        # Utiliser total_participants si disponible (groupé), sinon participants
-        participants_to_use = None
-        if hasattr(obj, '_total_participants'):
-            participants_to_use = obj._total_participants
-        else:
-            # Pour MealPlanRangeListSerializer, on n'a pas get_participants, donc utiliser une liste vide
-            participants_to_use = []
-        
-        # Compter uniquement les participants actifs (accepted ou pending)
-        active_participants_count = sum(
-            1 for p in participants_to_use
-            if isinstance(p, dict) and p.get('status') in ['accepted', 'pending']
-        )
-        
-        # Utiliser total_guest_count si disponible (groupé), sinon guest_count
-        guest_count_to_use = self.get_total_guest_count(obj)
-        
-        return 1 + active_participants_count + guest_count_to_use
+        return 1 + self.get_total_guest_count(obj)
     
     def get_groupedDates(self, obj: MealPlan):
         """Calculer groupedDates en agrégeant les dates de toutes les recettes groupées."""
         dates = set()
         for mprb in obj.meal_plan_recipe_batches.all():
             if mprb.recipe_batch_id:
-                for mp in MealPlan.objects.filter(meal_plan_recipe_batches__recipe_batch_id=mprb.recipe_batch_id):
-                    dates.add(mp.date.isoformat())
+                dates.update(get_cached_batch_dates(self, mprb.recipe_batch_id))
             else:
                 dates.add(obj.date.isoformat())
         return sorted(list(dates)) if dates else [obj.date.isoformat()]
@@ -949,78 +907,30 @@ class MealPlanByDateSerializer(serializers.ModelSerializer):
         ]
     
     def get_participants(self, obj: MealPlan):
-        from .models import MealInvitation
-        # Utiliser le prefetch si disponible (via Prefetch), sinon faire une requête
-        # obj.invitations.all() utilisera automatiquement le cache si prefetch est fait
-        invitations = obj.invitations.all() if hasattr(obj, 'invitations') else MealInvitation.objects.filter(meal_plan=obj).select_related('invitee')
+        # by_date précharge les invitations (+ invitee) : lecture du cache, aucune requête
+        invitations = obj.invitations.all()
         # Uniq par user avec priorité accepted > pending > declined
-        precedence = {'accepted': 3, 'pending': 2, 'declined': 1}
-        by_user_id = {}
-        for inv in invitations:
-            uid = inv.invitee.id
-            existing = by_user_id.get(uid)
-            if not existing or precedence.get(inv.status, 0) > precedence.get(existing['status'], 0):
-                by_user_id[uid] = {
-                    'user': UserLightSerializer(inv.invitee, context=self.context).data,
-                    'status': inv.status,
-                }
-        return list(by_user_id.values())
+        return dedupe_participants(self, ((inv.invitee, inv.status) for inv in invitations))
     
     def get_total_guest_count(self, obj: MealPlan):
-        """
-        Retourne le total_guest_count pré-calculé dans by_date.
-        Si pas pré-calculé, retourne simplement guest_count (meal plan non groupé).
-        """
-        if hasattr(obj, '_total_guest_count'):
-            return obj._total_guest_count
+        """Nombre d'invités hors application du meal plan (guest_count)."""
         return obj.guest_count or 0
     
     def get_total_participants(self, obj: MealPlan):
-        """
-        Retourne les participants groupés pré-calculés dans by_date.
-        Si pas pré-calculé, retourne les participants du meal plan individuel.
-        """
-        if hasattr(obj, '_total_participants'):
-            precedence = {'accepted': 3, 'pending': 2, 'declined': 1}
-            by_user_id = {}
-            for p in obj._total_participants:
-                uid = p['user'].id
-                existing = by_user_id.get(uid)
-                if not existing or precedence.get(p['status'], 0) > precedence.get(existing['status'], 0):
-                    by_user_id[uid] = {
-                        'user': UserLightSerializer(p['user'], context=self.context).data,
-                        'status': p['status'],
-                    }
-            return list(by_user_id.values())
-        
-        # Fallback : utiliser get_participants normal
+        """Participants du meal plan (invitations dédupliquées)."""
         return self.get_participants(obj)
     
     def get_total_servings(self, obj: MealPlan):
         """
         Calcule le nombre total de personnes pour ce meal plan.
-        Pour un meal plan simple : 1 + participants actifs + guest_count
-        Pour un meal plan groupé : utilise _total_servings pré-calculé
+        1 + participants actifs + guest_count
         """
-        # Si on a un total_servings pré-calculé (meal plan groupé), l'utiliser
-        if hasattr(obj, '_total_servings'):
-            return obj._total_servings
-        
-        # Sinon, calculer pour un meal plan simple
-        # Utiliser total_participants si disponible (groupé), sinon participants
-        participants_to_use = None
-        if hasattr(obj, '_total_participants'):
-            participants_to_use = obj._total_participants
-        else:
-            participants_to_use = self.get_participants(obj)
-        
         # Compter uniquement les participants actifs (accepted ou pending)
         active_participants_count = sum(
-            1 for p in participants_to_use
-            if isinstance(p, dict) and p.get('status') in ['accepted', 'pending']
+            1 for p in self.get_participants(obj)
+            if p['status'] in ACTIVE_PARTICIPANT_STATUSES
         )
         
-        # Utiliser total_guest_count si disponible (groupé), sinon guest_count
         guest_count_to_use = self.get_total_guest_count(obj)
         
         return 1 + active_participants_count + guest_count_to_use
@@ -1030,8 +940,7 @@ class MealPlanByDateSerializer(serializers.ModelSerializer):
         dates = set()
         for mprb in obj.meal_plan_recipe_batches.all():
             if mprb.recipe_batch_id:
-                for mp in MealPlan.objects.filter(meal_plan_recipe_batches__recipe_batch_id=mprb.recipe_batch_id):
-                    dates.add(mp.date.isoformat())
+                dates.update(get_cached_batch_dates(self, mprb.recipe_batch_id))
             else:
                 dates.add(obj.date.isoformat())
         return sorted(list(dates)) if dates else [obj.date.isoformat()]
@@ -1120,45 +1029,14 @@ class PostPhotoLightSerializer(serializers.ModelSerializer):
             return None
         
         from django.conf import settings
-        import boto3
+        from savr_back.settings import build_presigned_get_url
         
         # Si pas de configuration S3, retourner None
         if not settings.AWS_ACCESS_KEY_ID or not settings.AWS_SECRET_ACCESS_KEY or not settings.AWS_BUCKET:
             return None
         
-        try:
-            # Nettoyer le chemin (enlever le préfixe s3:/ si présent)
-            clean_path = obj.image_path.replace('s3:/', '').lstrip('/')
-            
-            # Configurer le client S3
-            s3_config = {
-                'aws_access_key_id': settings.AWS_ACCESS_KEY_ID,
-                'aws_secret_access_key': settings.AWS_SECRET_ACCESS_KEY,
-                'region_name': settings.AWS_S3_REGION_NAME
-            }
-            
-            if settings.AWS_ENDPOINT:
-                s3_config['endpoint_url'] = settings.AWS_ENDPOINT
-                if settings.AWS_ENDPOINT.startswith('http://'):
-                    s3_config['use_ssl'] = False
-            
-            s3_client = boto3.client('s3', **s3_config)
-            
-            # Générer l'URL pré-signée (valide 1 heure)
-            presigned_url = s3_client.generate_presigned_url(
-                'get_object',
-                Params={
-                    'Bucket': settings.AWS_BUCKET,
-                    'Key': clean_path,
-                },
-                ExpiresIn=3600  # 1 heure
-            )
-            
-            return presigned_url
-        except Exception as e:
-            # En cas d'erreur, retourner None
-            print(f"⚠️ Error generating presigned URL: {e}")
-            return None
+        # Client S3 partagé : plus de session boto3 reconstruite pour chaque photo
+        return build_presigned_get_url(obj.image_path)
     
     def get_captured_label(self, obj):
         base_labels = {
@@ -1235,7 +1113,7 @@ class PostPhotoSerializer(serializers.ModelSerializer):
             return presigned_url
         except Exception as e:
             # En cas d'erreur, retourner l'URL directe en espérant que le bucket est public
-            print(f"⚠️ Error generating presigned URL: {e}")
+            logger.warning("Error generating presigned URL: %s", e)
             return self.get_image_url(obj)
     
     def get_captured_label(self, obj):
@@ -1333,7 +1211,9 @@ class PostSerializer(serializers.ModelSerializer):
         }
     
     def get_cookies_count(self, obj):
-        """Nombre total de cookies sur le post - utilise les données préchargées"""
+        """Nombre total de cookies sur le post - utilise l'annotation ou les données préchargées"""
+        if getattr(obj, 'cookies_count', None) is not None:
+            return obj.cookies_count
         # Si les cookies sont déjà préchargés, utiliser len() au lieu de count()
         if hasattr(obj, '_prefetched_objects_cache') and 'cookies' in obj._prefetched_objects_cache:
             return len(obj._prefetched_objects_cache['cookies'])
@@ -1344,12 +1224,25 @@ class PostSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
+        # Annotation Exists posée par PostViewSet.get_queryset
+        if getattr(obj, 'has_cookied', None) is not None:
+            return obj.has_cookied
         # Si les cookies sont déjà préchargés, vérifier en mémoire
         if hasattr(obj, '_prefetched_objects_cache') and 'cookies' in obj._prefetched_objects_cache:
             return any(cookie.user_id == request.user.id for cookie in obj._prefetched_objects_cache['cookies'])
         return obj.cookies.filter(user=request.user).exists()
 
 
+class MinimalPostSerializer(serializers.ModelSerializer):
+    """État des cookies d'un post après send_cookie / remove_cookie (annotations de PostViewSet)"""
+    cookies_count = serializers.IntegerField(read_only=True)
+    has_cookie_from_user = serializers.BooleanField(source='has_cookied', read_only=True)
+    
+    class Meta:
+        model = Post
+        fields = ['id', 'cookies_count', 'has_cookie_from_user']
+
+
 class PostPhotoListSerializer(serializers.ModelSerializer):
     """Version allégée pour la liste de posts (uniquement les URLs)."""
     image_url = serializers.SerializerMethodField()
@@ -1474,6 +1367,8 @@ class PostListSerializer(serializers.ModelSerializer):
         }
     
     def get_cookies_count(self, obj):
+        if getattr(obj, 'cookies_count', None) is not None:
+            return obj.cookies_count
         if hasattr(obj, '_prefetched_objects_cache') and 'cookies' in obj._prefetched_objects_cache:
             return len(obj._prefetched_objects_cache['cookies'])
         return obj.cookies.count()
@@ -1482,6 +1377,8 @@ class PostListSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
+        if getattr(obj, 'has_cookied', None) is not None:
+            return obj.has_cookied
         if hasattr(obj, '_prefetched_objects_cache') and 'cookies' in obj._prefetched_objects_cache:
             return any(cookie.user_id == request.user.id for cookie in obj._prefetched_objects_cache['cookies'])
         return obj.cookies.filter(user=request.user).exists()
@@ -1603,7 +1500,7 @@ class CollectionMemberSerializer(serializers.ModelSerializer):
         read_only_fields = ['joined_at']
 
 
-class CollectionSerializer(serializers.ModelSerializer):
+class CollectionSerializer(CachedFieldsModelSerializer):
     """Serializer pour afficher une collection avec ses recettes"""
     owner = UserLightSerializer(read_only=True)
     recipes_count = serializers.SerializerMethodField()
@@ -1621,9 +1518,10 @@ class CollectionSerializer(serializers.ModelSerializer):
     def get_recipes_count(self, obj):
         """Compter les recettes de manière optimisée"""
         try:
-            if hasattr(obj, 'recipes_count'):
-                # Si le count a été précalculé via annotate
-                return obj.recipes_count
+            # Si le count a été précalculé via annotate (recipes_count est une propriété
+            # du modèle qui lance un COUNT, l'annotation s'appelle total_recipes)
+            if hasattr(obj, 'total_recipes'):
+                return obj.total_recipes
             # Sinon, utiliser la relation préchargée
             if hasattr(obj, '_prefetched_objects_cache') and 'collection_recipes' in obj._prefetched_objects_cache:
                 return len(obj._prefetched_objects_cache['collection_recipes'])
@@ -1647,7 +1545,7 @@ class CollectionSerializer(serializers.ModelSerializer):
         return None
 
 
-class CollectionListSerializer(serializers.ModelSerializer):
+class CollectionListSerializer(CachedFieldsModelSerializer):
     """Serializer simplifié pour la liste des collections"""
     owner = UserLightSerializer(read_only=True)
     recipes_count = serializers.SerializerMethodField()
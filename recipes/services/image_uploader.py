@@ -2,7 +2,7 @@
 Service pour télécharger et uploader des images vers S3/MinIO
 """
 import logging
-import uuid
+import secrets
 import requests
 from io import BytesIO
 from typing import Optional
@@ -72,7 +72,7 @@ def download_and_upload_image(image_url: str, user_id: int, recipe_id: Optional[
             return None
         
         # Générer un nom de fichier unique
-        unique_id = str(uuid.uuid4()).replace('-', '')
+        unique_id = secrets.token_hex(16)
         if recipe_id:
             file_name = f"recipes/{user_id}/{recipe_id}/{unique_id}.{file_extension}"
         else:
@@ -0,0 +1,64 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import Follow
+from .models import MealPlan, MealPlanRecipeBatch, MealInvitation, Post, PostPhoto, PostCookie
+from .utils import (
+    invalidate_meal_plan_cache, invalidate_batch_servings_cache, invalidate_meal_plan_batches_servings,
+    invalidate_feed_cache,
+)
+
+
+def _invalidate_meal_plan_owner(meal_plan_id):
+    user_id = MealPlan.objects.filter(id=meal_plan_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        invalidate_meal_plan_cache(user_id)
+
+
+@receiver([post_save, post_delete], sender=MealPlan)
+def invalidate_cache_on_meal_plan_change(sender, instance, **kwargs):
+    invalidate_meal_plan_cache(instance.user_id)
+
+
+@receiver(post_save, sender=MealPlan)
+def invalidate_batch_servings_on_meal_plan_save(sender, instance, created, **kwargs):
+    # guest_count entre dans total_servings_batch ; à la suppression, les liens
+    # supprimés en cascade émettent leur propre post_delete
+    if not created:
+        invalidate_meal_plan_batches_servings(instance.id)
+
+
+@receiver([post_save, post_delete], sender=MealPlanRecipeBatch)
+def invalidate_cache_on_meal_plan_batch_change(sender, instance, **kwargs):
+    _invalidate_meal_plan_owner(instance.meal_plan_id)
+    invalidate_batch_servings_cache([instance.recipe_batch_id])
+
+
+@receiver([post_save, post_delete], sender=MealInvitation)
+def invalidate_cache_on_invitation_change(sender, instance, **kwargs):
+    # Les participants font partie du payload by_date de l'hôte et de total_servings_batch
+    _invalidate_meal_plan_owner(instance.meal_plan_id)
+    invalidate_meal_plan_batches_servings(instance.meal_plan_id)
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=PostPhoto)
+def invalidate_feed_on_post_change(sender, instance, **kwargs):
+    # Une photo encore rattachée au seul batch n'apparaît pas dans le fil
+    if sender is PostPhoto and instance.post_id is None:
+        return
+    # Au commit : une lecture concurrente ne doit pas remettre en cache l'état d'avant
+    transaction.on_commit(invalidate_feed_cache)
+
+
+@receiver([post_save, post_delete], sender=PostCookie)
+def invalidate_feed_on_cookie_change(sender, instance, **kwargs):
+    # has_cookied est propre à l'utilisateur ; les compteurs vus par les autres suivent le TTL
+    invalidate_feed_cache(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def invalidate_feed_on_follow_change(sender, instance, **kwargs):
+    # Le fil friends_only des deux utilisateurs change
+    invalidate_feed_cache(instance.follower_id, instance.following_id)
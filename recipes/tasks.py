@@ -181,3 +181,15 @@ def process_recipe_import_from_url(self, request_id: str):
         import_request.save(update_fields=['status', 'error_message', 'updated_at'])
         raise
 
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def delete_s3_object(self, bucket: str, key: str):
+    """Supprimer un objet S3 hors du cycle requête/réponse (ex: photo supprimée)."""
+    from savr_back.settings import build_s3_client
+
+    try:
+        build_s3_client().delete_object(Bucket=bucket, Key=key)
+    except Exception as exc:
+        logger.warning("[S3DeleteTask] Error deleting %s from %s: %s", key, bucket, exc)
+        raise self.retry(exc=exc)
@@ -0,0 +1,82 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from recipes.models import MealPlan, MealPlanRecipeBatch, Post, PostPhoto, Recipe, RecipeBatch
+
+
+class PostPhotoUploadAPITestCase(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username='tester',
+            email='tester@example.com',
+            password='password123',
+        )
+        self.other_user = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='password123',
+        )
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(user=self.user, comment='Brunch')
+
+    def test_confirm_photo_upload_attaches_photo_to_own_post(self):
+        url = reverse('post-confirm-photo-upload')
+        response = self.client.post(url, {
+            'post_id': self.post.id,
+            'image_path': f'posts/{self.post.id}/abc.jpg',
+            'photo_type': 'spontaneous',
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        photo = PostPhoto.objects.get(id=response.data['id'])
+        self.assertEqual(photo.post_id, self.post.id)
+        self.assertIsNone(photo.recipe_batch_id)
+
+    def test_confirm_photo_upload_rejects_post_of_another_user(self):
+        other_post = Post.objects.create(user=self.other_user)
+        url = reverse('post-confirm-photo-upload')
+        response = self.client.post(url, {
+            'post_id': other_post.id,
+            'image_path': f'posts/{other_post.id}/abc.jpg',
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(PostPhoto.objects.filter(post=other_post).exists())
+
+    def test_publish_from_meal_plan_keeps_one_photo_per_restricted_type(self):
+        meal_plan = MealPlan.objects.create(
+            user=self.user,
+            date=date(2026, 1, 10),
+            meal_time='dinner',
+            meal_type='dinner',
+        )
+        photos = []
+        for title in ('Gratin', 'Salade'):
+            recipe = Recipe.objects.create(title=title, prep_time=10, cook_time=20, created_by=self.user)
+            batch = RecipeBatch.objects.create(recipe=recipe, created_by=self.user)
+            MealPlanRecipeBatch.objects.create(meal_plan=meal_plan, recipe_batch=batch)
+            photos.append(PostPhoto.objects.create(
+                recipe_batch=batch,
+                photo_type='after_cooking',
+                image_path=f'recipe_batches/{batch.id}/after.jpg',
+            ))
+            photos.append(PostPhoto.objects.create(
+                recipe_batch=batch,
+                photo_type='spontaneous',
+                image_path=f'recipe_batches/{batch.id}/spontaneous.jpg',
+            ))
+
+        url = reverse('post-publish-from-meal-plan')
+        response = self.client.post(url, {'meal_plan_id': meal_plan.id}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        post = Post.objects.get(id=response.data['id'])
+        self.assertEqual(post.photos.filter(photo_type='after_cooking').count(), 1)
+        self.assertEqual(post.photos.filter(photo_type='spontaneous').count(), 2)
+        photos[2].refresh_from_db()
+        self.assertIsNone(photos[2].post_id)
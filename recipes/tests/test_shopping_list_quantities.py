@@ -0,0 +1,91 @@
+import json
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from recipes.models import (
+    Category, Ingredient, MealPlan, MealPlanRecipeBatch, Recipe, RecipeBatch,
+    RecipeIngredient, ShoppingList,
+)
+
+
+class ShoppingListQuantitiesAPITestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='tester',
+            email='tester@example.com',
+            password='password123',
+        )
+        self.client.force_authenticate(self.user)
+
+        epicerie = Category.objects.create(name='Épicerie')
+        self.flour = Ingredient.objects.create(name='Farine', category=epicerie)
+        self.eggs = Ingredient.objects.create(name='Oeufs')
+
+        self.crepes = crepes = self._create_recipe('Crêpes', servings=2)
+        self.cake = cake = self._create_recipe('Cake', servings=4)
+        RecipeIngredient.objects.create(recipe=crepes, ingredient=self.flour, quantity=200, unit='g')
+        RecipeIngredient.objects.create(recipe=crepes, ingredient=self.eggs, quantity=3, unit='piece')
+        RecipeIngredient.objects.create(recipe=cake, ingredient=self.flour, quantity=300, unit='g')
+
+        # Crêpes : 1 meal plan + 1 convive = 2 portions (ratio 1)
+        # Cake : 1 meal plan + 7 convives = 8 portions (ratio 2)
+        crepes_batch = self._create_batch(crepes, guest_count=1, day=1)
+        cake_batch = self._create_batch(cake, guest_count=7, day=2)
+
+        self.shopping_list = ShoppingList.objects.create(user=self.user)
+        self.shopping_list.recipe_batches.add(crepes_batch, cake_batch)
+
+    def _get_quantities(self):
+        url = reverse('shoppinglistitem-with-quantities')
+        response = self.client.get(url, {'shopping_list_id': self.shopping_list.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json.loads(b''.join(response.streaming_content))
+
+    def _create_recipe(self, title, servings):
+        return Recipe.objects.create(
+            title=title,
+            prep_time=10,
+            cook_time=20,
+            created_by=self.user,
+            servings=servings,
+        )
+
+    def _create_batch(self, recipe, guest_count, day):
+        batch = RecipeBatch.objects.create(recipe=recipe, created_by=self.user)
+        meal_plan = MealPlan.objects.create(
+            user=self.user,
+            date=date(2026, 1, day),
+            meal_time='lunch',
+            meal_type='lunch',
+            guest_count=guest_count,
+        )
+        MealPlanRecipeBatch.objects.create(meal_plan=meal_plan, recipe_batch=batch)
+        return batch
+
+    def test_with_quantities_sums_each_ingredient_once_per_batch(self):
+        data = self._get_quantities()
+
+        quantities = {entry['id']: entry['quantity'] for entry in data}
+        # 200 g × 1 + 300 g × 2 : aucune ligne comptée deux fois
+        self.assertAlmostEqual(quantities[self.flour.id], 800)
+        self.assertAlmostEqual(quantities[self.eggs.id], 3)
+        self.assertEqual(len(data), 2)
+
+    def test_with_quantities_keeps_one_entry_per_unit(self):
+        milk = Ingredient.objects.create(name='Lait')
+        RecipeIngredient.objects.create(recipe=self.crepes, ingredient=milk, quantity=500, unit='ml')
+        RecipeIngredient.objects.create(recipe=self.cake, ingredient=milk, quantity=0.25, unit='l')
+
+        data = self._get_quantities()
+
+        milk_quantities = {
+            entry['unit']: entry['quantity'] for entry in data if entry['id'] == milk.id
+        }
+        # Les ml et les l ne sont plus additionnés entre eux
+        self.assertEqual(milk_quantities, {'ml': 500, 'l': 0.5})
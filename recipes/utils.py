@@ -1,4 +1,12 @@
-from django.db.models import Q
+import functools
+import logging
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection, reset_queries
+from django.db.models import Count, Q
+
+logger = logging.getLogger(__name__)
 
 
 def get_accessible_meal_plan_filter(user):
@@ -12,3 +20,190 @@ def get_accessible_meal_plan_filter(user):
         Q(invitations__invitee=user, invitations__status='accepted')  # Invité accepté
     )
 
+
+ACTIVE_INVITATION_STATUSES = ('accepted', 'pending')
+
+
+def with_active_invitations_count(queryset):
+    """
+    Annote chaque MealPlan avec active_invitations : nombre d'invitations
+    accepted ou pending, calculé en SQL (COUNT filtré) sans charger les invitations.
+    """
+    return queryset.annotate(
+        active_invitations=Count(
+            'invitations',
+            filter=Q(invitations__status__in=ACTIVE_INVITATION_STATUSES),
+            distinct=True,
+        )
+    )
+
+
+def get_active_invitations_count(meal_plan):
+    """Nombre d'invitations actives : annotation si présente, sinon une requête COUNT."""
+    count = getattr(meal_plan, 'active_invitations', None)
+    if count is None:
+        count = meal_plan.invitations.filter(status__in=ACTIVE_INVITATION_STATUSES).count()
+    return count
+
+
+def get_first_recipe_batch_link(meal_plan):
+    """
+    Retourne le premier MealPlanRecipeBatch d'un meal plan (ou None).
+    Lit la liste préchargée via all() : contrairement à first(), aucun
+    LIMIT 1 n'est réémis quand meal_plan_recipe_batches est déjà prefetché.
+    """
+    return next(iter(meal_plan.meal_plan_recipe_batches.all()), None)
+
+
+def get_recipe_batch_ids(meal_plan):
+    """Ids des batches liés au meal plan, lus depuis le cache de prefetch si présent."""
+    return [mprb.recipe_batch_id for mprb in meal_plan.meal_plan_recipe_batches.all() if mprb.recipe_batch_id]
+
+
+def get_batch_dates_map(batch_ids):
+    """
+    Pour une liste de batches, retourne {batch_id: [dates iso triées]} en une seule requête
+    (une date par meal plan lié). Sert à groupedDates sans requête par objet.
+    """
+    from .models import MealPlanRecipeBatch
+
+    dates_by_batch = {batch_id: [] for batch_id in batch_ids}
+    if not dates_by_batch:
+        return dates_by_batch
+    rows = MealPlanRecipeBatch.objects.filter(
+        recipe_batch_id__in=dates_by_batch.keys()
+    ).values_list('recipe_batch_id', 'meal_plan__date')
+    # Seul l'agrégat {batch: dates} reste en mémoire, pas la liste complète des lignes
+    for batch_id, meal_date in rows.iterator(chunk_size=2000):
+        dates_by_batch[batch_id].append(meal_date.isoformat())
+    for dates in dates_by_batch.values():
+        dates.sort()
+    return dates_by_batch
+
+
+MEAL_PLAN_CACHE_TTL = 45  # secondes
+
+
+def _meal_plan_cache_version_key(user_id):
+    return f"mp:{user_id}:v"
+
+
+def get_meal_plan_cache_key(user_id, action, query_params):
+    """
+    Clé de cache d'une réponse meal plans : (utilisateur, version, action, hash des query params).
+    La version par utilisateur est incrémentée à chaque écriture, ce qui invalide toutes ses clés
+    sans avoir besoin de suppression par motif.
+    """
+    import hashlib
+    from django.core.cache import cache
+
+    version = cache.get_or_set(_meal_plan_cache_version_key(user_id), 1, None)
+    params = '&'.join(
+        f"{key}={','.join(values)}" for key, values in sorted(query_params.lists())
+    )
+    digest = hashlib.md5(params.encode('utf-8')).hexdigest()
+    return f"mp:{user_id}:{version}:{action}:{digest}"
+
+
+def invalidate_meal_plan_cache(user_id):
+    """Invalider les réponses meal plans en cache d'un utilisateur."""
+    from django.core.cache import cache
+
+    version_key = _meal_plan_cache_version_key(user_id)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, 1, None)
+
+
+FEED_CACHE_TTL = 45  # secondes
+FEED_CACHE_GLOBAL_VERSION_KEY = "feed:v"
+
+
+def _feed_cache_version_key(user_id):
+    return f"feed:{user_id}:v"
+
+
+def get_feed_cache_key(user_id, query_params):
+    """
+    Clé de cache de la première page du fil publié : (utilisateur, version du fil, version
+    de l'utilisateur, hash des query params). La version globale change à chaque post/photo,
+    celle de l'utilisateur avec ses cookies et ses complices (has_cookied, friends_only).
+    """
+    import hashlib
+    from django.core.cache import cache
+
+    user_version_key = _feed_cache_version_key(user_id)
+    versions = cache.get_many([FEED_CACHE_GLOBAL_VERSION_KEY, user_version_key])
+    global_version = versions.get(FEED_CACHE_GLOBAL_VERSION_KEY) or cache.get_or_set(FEED_CACHE_GLOBAL_VERSION_KEY, 1, None)
+    user_version = versions.get(user_version_key) or cache.get_or_set(user_version_key, 1, None)
+    params = '&'.join(
+        f"{key}={','.join(values)}" for key, values in sorted(query_params.lists())
+    )
+    digest = hashlib.md5(params.encode('utf-8')).hexdigest()
+    return f"feed:{user_id}:{global_version}:{user_version}:{digest}"
+
+
+def invalidate_feed_cache(*user_ids):
+    """
+    Invalider le fil en cache : des utilisateurs donnés, ou de tout le monde si aucun id
+    n'est passé (nouveau post, photos modifiées).
+    """
+    from django.core.cache import cache
+
+    version_keys = [_feed_cache_version_key(user_id) for user_id in user_ids] or [FEED_CACHE_GLOBAL_VERSION_KEY]
+    for version_key in version_keys:
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            cache.set(version_key, 1, None)
+
+
+BATCH_SERVINGS_CACHE_TTL = 300  # secondes
+
+
+def batch_servings_cache_key(batch_id):
+    return f"batch_servings:{batch_id}"
+
+
+def invalidate_batch_servings_cache(batch_ids):
+    """Oublier total_servings_batch des batches donnés (convives, invitations ou liens modifiés)."""
+    from django.core.cache import cache
+
+    keys = [batch_servings_cache_key(batch_id) for batch_id in batch_ids if batch_id]
+    if keys:
+        cache.delete_many(keys)
+
+
+def invalidate_meal_plan_batches_servings(meal_plan_id):
+    """Invalider total_servings_batch de tous les batches liés à un meal plan."""
+    from .models import MealPlanRecipeBatch
+
+    invalidate_batch_servings_cache(
+        MealPlanRecipeBatch.objects.filter(meal_plan_id=meal_plan_id).values_list('recipe_batch_id', flat=True)
+    )
+
+
+def debug_timing(name):
+    """
+    Décorateur de diagnostic pour les méthodes de vue : nombre/temps des requêtes SQL et durée totale.
+    Résolu à l'import : quand DEBUG=False la méthode est retournée telle quelle (aucun coût par requête).
+    """
+    if not settings.DEBUG:
+        return lambda view_method: view_method
+
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(*args, **kwargs):
+            reset_queries()
+            t0 = perf_counter()
+            response = view_method(*args, **kwargs)
+            total_ms = (perf_counter() - t0) * 1000
+            db_time_ms = sum(float(q.get('time', 0)) for q in connection.queries) * 1000
+            logger.debug(
+                "[%s] db_queries=%d db_time_ms=%.1f total_ms=%.1f",
+                name, len(connection.queries), db_time_ms, total_ms,
+            )
+            return response
+        return wrapper
+    return decorator
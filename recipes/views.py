@@ -2,17 +2,25 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count, Max, Case, When, IntegerField, Prefetch
+from rest_framework.utils.encoders import JSONEncoder
+from django.db.models import Q, Count, Max, Sum, Case, When, Value, IntegerField, FloatField, Prefetch, Exists, OuterRef
+from django.db.models.functions import Cast
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, date, timedelta
+from itertools import islice
+from collections import defaultdict
 from time import perf_counter
 from django.conf import settings
-from django.db import connection, transaction
+from django.db import connection, transaction, IntegrityError
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from urllib.parse import urlparse
 from pgvector.django import CosineDistance
 from pydantic_ai.exceptions import UserError as PydanticAIUserError
-import uuid
+import re
+import hashlib
+import secrets
 import logging
 from savr_back.settings import build_s3_client, build_s3_url, build_presigned_get_url
 from .services.ingredient_matcher import get_batch_embeddings
@@ -23,8 +31,10 @@ from .models import (
     RecipeImportRequest, RecipeBatch, MealPlanRecipeBatch
 )
 from accounts.models import Follow
+from accounts.utils import queue_notification, get_friend_ids
 PHOTO_TYPES = [choice[0] for choice in PostPhoto.PHOTO_TYPE_CHOICES]
 RESTRICTED_PHOTO_TYPES = PostPhoto.UNIQUE_TYPES
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
 from .serializers import (
     RecipeSerializer, RecipeDetailSerializer, RecipeCreateSerializer, RecipeLightSerializer,
     StepSerializer, IngredientSerializer, CategorySerializer,
@@ -33,15 +43,81 @@ from .serializers import (
     MealPlanMinimalListSerializer,
     CookingProgressSerializer, CookingProgressCreateUpdateSerializer,
     TimerSerializer, TimerCreateSerializer,
-    PostSerializer, PostCreateUpdateSerializer, PostPhotoSerializer,
+    PostSerializer, PostCreateUpdateSerializer, PostPhotoSerializer, MinimalPostSerializer,
     ShoppingListSerializer, ShoppingListItemSerializer,
     CollectionSerializer, CollectionCreateSerializer, CollectionUpdateSerializer,
     CollectionRecipeSerializer, CollectionMemberSerializer,
     RecipeFormalizeSerializer, RecipeImportRequestSerializer,
     RecipeBatchLightSerializer
 )
-from .tasks import process_recipe_import
-from .utils import get_accessible_meal_plan_filter
+from .tasks import process_recipe_import, delete_s3_object
+from .pagination import MealPlanPageNumberPagination, PostCursorPagination
+from .utils import (
+    get_accessible_meal_plan_filter, get_first_recipe_batch_link, get_recipe_batch_ids,
+    get_batch_dates_map, get_meal_plan_cache_key, MEAL_PLAN_CACHE_TTL, debug_timing,
+    invalidate_meal_plan_cache,
+    batch_servings_cache_key, BATCH_SERVINGS_CACHE_TTL,
+    invalidate_batch_servings_cache, invalidate_meal_plan_batches_servings,
+    get_feed_cache_key, FEED_CACHE_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Colonnes lues par les serializers de liste des meal plans (MealPlanRangeListSerializer, MealPlanListSerializer)
+MEAL_PLAN_LIST_FIELDS = ('id', 'date', 'meal_time', 'meal_type', 'confirmed', 'guest_count')
+MEAL_PLAN_LIST_USER_FIELDS = ('user', 'user__id', 'user__username', 'user__avatar_url')
+# Colonnes de Recipe jamais lues par RecipeLightSerializer (embedding pgvector, textes longs)
+RECIPE_LIGHT_DEFERRED_FIELDS = ('embedding', 'description', 'steps_summary', 'import_source_url')
+# Quantités d'une liste de courses : la clé porte sa propre version (batches, ratios, recettes)
+SHOPPING_LIST_QUANTITIES_CACHE_TTL = 3600  # secondes
+# Colonnes lues par PostPhotoLightSerializer (galeries photos)
+POST_PHOTO_GALLERY_FIELDS = ('id', 'photo_type', 'image_path', 'created_at', 'step', 'step__id', 'step__order')
+# Colonnes nécessaires à _user_can_manage_photo (accès au batch ou propriétaire du post)
+PHOTO_PERMISSION_FIELDS = ('id', 'recipe_batch', 'post', 'post__user')
+# Configuration S3 figée au chargement du module (immuable pendant la vie du process)
+S3_BUCKET = (settings.AWS_BUCKET or '').strip()
+S3_CONFIGURED = bool(settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY and S3_BUCKET)
+if not S3_CONFIGURED:
+    logger.warning("S3 configuration is missing (AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY / AWS_BUCKET): photo uploads are disabled")
+
+
+def queue_s3_object_deletion(bucket, key):
+    """
+    Mettre en file la suppression d'un objet S3, au mieux : la ligne en base est déjà supprimée,
+    une indisponibilité du broker ne doit pas faire échouer la requête (objet orphelin journalisé).
+    """
+    try:
+        delete_s3_object.delay(bucket, key)
+    except Exception:
+        logger.exception("Failed to queue S3 deletion for %s/%s", bucket, key)
+
+
+def meal_plan_recipe_batches_prefetch():
+    """Prefetch des batches d'un meal plan avec la recette, sans les colonnes lourdes de Recipe."""
+    return Prefetch(
+        'meal_plan_recipe_batches',
+        queryset=MealPlanRecipeBatch.objects.select_related('recipe_batch__recipe').defer(
+            *(f'recipe_batch__recipe__{field}' for field in RECIPE_LIGHT_DEFERRED_FIELDS)
+        ).order_by('order')
+    )
+
+
+def shopping_list_full_prefetch():
+    """Prefetch d'une liste de courses : batches avec recette et ingrédients, items avec ingrédient."""
+    # Colonnes réduites : ni embeddings (vecteurs de 384 floats) ni textes longs de Recipe
+    recipe_ingredients = RecipeIngredient.objects.select_related('ingredient__category').only(
+        'id', 'recipe', 'quantity', 'unit',
+        'ingredient__id', 'ingredient__name', 'ingredient__category__id', 'ingredient__category__name'
+    )
+    return (
+        Prefetch('recipe_batches', queryset=RecipeBatch.objects.select_related('recipe').defer(
+            *(f'recipe__{field}' for field in RECIPE_LIGHT_DEFERRED_FIELDS)
+        ).prefetch_related(
+            Prefetch('recipe__recipe_ingredients', queryset=recipe_ingredients)
+        )),
+        Prefetch('items', queryset=ShoppingListItem.objects.select_related('ingredient__category').defer('ingredient__embedding')),
+    )
 
 
 class RecipeBatchViewSet(viewsets.ReadOnlyModelViewSet):
@@ -83,29 +159,20 @@ class RecipeBatchViewSet(viewsets.ReadOnlyModelViewSet):
     
     def list(self, request, *args, **kwargs):
         # post-process for groupedDates & total_servings_batch
-        queryset = self.filter_queryset(self.get_queryset())
+        batches = list(self.filter_queryset(self.get_queryset()))
+        # Pour total_servings_batch, calculer avec TOUS les meal plans du batch
+        # (même ceux auxquels l'utilisateur n'est pas invité), agrégé en SQL pour toute la liste
+        servings_by_batch = calculate_batches_servings([batch.id for batch in batches])
         data = []
-        for batch in queryset:
+        for batch in batches:
             # Filtrer les meal plans accessibles par l'utilisateur pour ce batch
             accessible_meal_plan_filter = get_accessible_meal_plan_filter(request.user)
             meal_plans_accessible = MealPlan.objects.filter(
                 meal_plan_recipe_batches__recipe_batch=batch
             ).filter(accessible_meal_plan_filter).distinct()
             
-            # Pour total_servings_batch, calculer avec TOUS les meal plans du batch
-            # (même ceux auxquels l'utilisateur n'est pas invité)
-            from .models import MealInvitation
-            all_meal_plans = MealPlan.objects.filter(
-                meal_plan_recipe_batches__recipe_batch=batch
-            ).prefetch_related(
-                Prefetch('invitations', queryset=MealInvitation.objects.select_related('invitee'))
-            ).distinct()
-            
             grouped_dates = sorted({mp.date.isoformat() for mp in meal_plans_accessible})
-            total_servings = 0
-            # Calculer le total avec TOUS les meal plans du batch
-            for mp in all_meal_plans:
-                total_servings += calculate_meal_plan_servings(mp)
+            total_servings = servings_by_batch.get(batch.id, 0)
             
             meals = []
             meal_plan_ids = []
@@ -136,37 +203,10 @@ class RecipeBatchViewSet(viewsets.ReadOnlyModelViewSet):
             meal_plan_recipe_batches__recipe_batch=batch
         ).filter(accessible_meal_plan_filter).distinct()
         
-        # Pour total_servings_batch, calculer avec TOUS les meal plans du batch
-        # (même ceux auxquels l'utilisateur n'est pas invité)
-        # Précharger les invitations pour pouvoir calculer correctement les servings
-        from .models import MealInvitation
-        all_meal_plans = MealPlan.objects.filter(
-            meal_plan_recipe_batches__recipe_batch=batch
-        ).prefetch_related(
-            Prefetch('invitations', queryset=MealInvitation.objects.select_related('invitee'))
-        ).distinct()
-        
         grouped_dates = sorted({mp.date.isoformat() for mp in meal_plans_accessible})
-        total_servings = 0
-        # Calculer le total avec TOUS les meal plans du batch
+        # Pour total_servings_batch, calculer avec TOUS les meal plans du batch
         # (même ceux auxquels l'utilisateur n'est pas invité)
-        all_meal_plans_list = list(all_meal_plans)
-        
-        import sys
-        print(f"\n{'='*60}", file=sys.stderr)
-        print(f"[RecipeBatchViewSet.retrieve] Batch {batch.id} - User {request.user.id}", file=sys.stderr)
-        print(f"  All meal plans: {len(all_meal_plans_list)}", file=sys.stderr)
-        print(f"  Accessible meal plans: {meal_plans_accessible.count()}", file=sys.stderr)
-        
-        for mp in all_meal_plans_list:
-            servings = calculate_meal_plan_servings(mp)
-            participants_count = mp.invitations.filter(status__in=['accepted', 'pending']).count() if hasattr(mp, 'invitations') else 0
-            guest_count = mp.guest_count or 0
-            print(f"  Meal plan {mp.id}: servings={servings} (1 + {participants_count} participants + {guest_count} guests)", file=sys.stderr)
-            total_servings += servings
-        
-        print(f"  ✅ TOTAL SERVINGS_BATCH: {total_servings}", file=sys.stderr)
-        print(f"{'='*60}\n", file=sys.stderr)
+        total_servings = calculate_batches_servings([batch.id])[batch.id]
         
         meals = []
         meal_plan_ids = []
@@ -214,7 +254,9 @@ class RecipeBatchViewSet(viewsets.ReadOnlyModelViewSet):
     def photos(self, request, pk=None):
         """Galerie de photos associées au batch"""
         batch = self.get_object()
-        photos = PostPhoto.objects.filter(recipe_batch=batch).select_related('step').order_by('-created_at')
+        photos = PostPhoto.objects.filter(recipe_batch=batch).select_related('step').only(
+            *POST_PHOTO_GALLERY_FIELDS
+        ).order_by('-created_at')
         from .serializers import PostPhotoLightSerializer
         serializer = PostPhotoLightSerializer(photos, many=True, context={'request': request})
         return Response(serializer.data)
@@ -237,12 +279,12 @@ class RecipeBatchViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({'error': 'You can select up to 10 photos'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Récupérer les photos dans l'ordre de sélection (ordre des photo_ids)
-        photos_dict = {p.id: p for p in PostPhoto.objects.filter(recipe_batch=batch, id__in=photo_ids)}
-        if len(photos_dict) != len(photo_ids):
+        photos_map = PostPhoto.objects.filter(recipe_batch=batch).in_bulk(photo_ids)
+        if len(photos_map) != len(photo_ids):
             return Response({'error': 'Some photos are invalid or do not belong to this batch'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Préserver l'ordre de sélection
-        photos = [photos_dict[pid] for pid in photo_ids]
+        photos = [photos_map[pid] for pid in photo_ids]
 
         post = Post.objects.create(
             user=request.user,
@@ -251,11 +293,11 @@ class RecipeBatchViewSet(viewsets.ReadOnlyModelViewSet):
             is_published=True
         )
 
-        # Associer les photos au post dans l'ordre de sélection et définir l'ordre
+        # Associer les photos au post dans l'ordre de sélection et définir l'ordre (un seul UPDATE)
         for order_index, photo in enumerate(photos, start=1):
             photo.post = post
             photo.order = order_index
-            photo.save(update_fields=['post', 'order'])
+        PostPhoto.objects.bulk_update(photos, ['post', 'order'])
 
         # Retourner une réponse simplifiée pour éviter les timeouts
         # (les presigned URLs seront générées lors de la récupération du post)
@@ -288,7 +330,6 @@ class RecipeBatchViewSet(viewsets.ReadOnlyModelViewSet):
         """Appliquer un batch à plusieurs dates en créant les meal plans nécessaires."""
         from django.db import transaction
         from decimal import Decimal
-        from datetime import datetime
         
         batch = self.get_object()
         
@@ -320,52 +361,74 @@ class RecipeBatchViewSet(viewsets.ReadOnlyModelViewSet):
         except (ValueError, TypeError):
             ratio = Decimal('1.0')
         
+        target_dates = parse_date_keys(date_keys)
         created_meal_plans = []
         
         with transaction.atomic():
-            for date_key in date_keys:
-                try:
-                    target_date = datetime.strptime(date_key, '%Y-%m-%d').date()
-                except ValueError:
-                    continue
-                
-                # Vérifier si un meal plan existe déjà pour cette date + meal_time
-                existing_meal_plan = MealPlan.objects.filter(
+            # Une seule requête pour les meal plans existants, avec le nombre de batches
+            # liés (ordre du nouveau lien) et la présence de ce batch
+            existing_by_date = {
+                mp.date: mp
+                for mp in MealPlan.objects.filter(
                     user=request.user,
-                    date=target_date,
-                    meal_time=meal_time
-                ).first()
+                    meal_time=meal_time,
+                    date__in=target_dates,
+                ).annotate(
+                    linked_batches_count=Count('meal_plan_recipe_batches'),
+                    has_batch=Exists(
+                        MealPlanRecipeBatch.objects.filter(meal_plan=OuterRef('pk'), recipe_batch=batch)
+                    ),
+                )
+            }
+            
+            # Créer en un seul INSERT les meal plans manquants (Postgres renvoie les PK)
+            new_by_date = {
+                mp.date: mp
+                for mp in MealPlan.objects.bulk_create([
+                    MealPlan(
+                        user=request.user,
+                        date=target_date,
+                        meal_time=meal_time,
+                        meal_type='recipe',
+                        confirmed=False,
+                    )
+                    for target_date in target_dates
+                    if target_date not in existing_by_date
+                ])
+            }
+            
+            # Liens meal plan <-> batch insérés en un seul INSERT après la boucle
+            links_to_create = []
+            for target_date in target_dates:
+                existing_meal_plan = existing_by_date.get(target_date)
                 
-                # Créer ou mettre à jour le meal plan
                 if existing_meal_plan:
-                    # Vérifier si le batch n'est pas déjà associé à ce meal plan
-                    if not existing_meal_plan.meal_plan_recipe_batches.filter(recipe_batch=batch).exists():
-                        # Ajouter le batch au meal plan existant
-                        MealPlanRecipeBatch.objects.create(
+                    # Ajouter le batch au meal plan existant s'il n'y est pas déjà
+                    if not existing_meal_plan.has_batch:
+                        links_to_create.append(MealPlanRecipeBatch(
                             meal_plan=existing_meal_plan,
                             recipe_batch=batch,
                             ratio=ratio,
-                            order=existing_meal_plan.meal_plan_recipe_batches.count()
-                        )
+                            order=existing_meal_plan.linked_batches_count
+                        ))
                     meal_plan = existing_meal_plan
                 else:
-                    # Créer un nouveau meal plan
-                    meal_plan = MealPlan.objects.create(
-                        user=request.user,
-                        date=target_date,
-                        meal_time=meal_time,
-                        meal_type='recipe',
-                        confirmed=False,
-                    )
-                    # Ajouter le batch au meal plan
-                    MealPlanRecipeBatch.objects.create(
+                    # Ajouter le batch au nouveau meal plan
+                    meal_plan = new_by_date[target_date]
+                    links_to_create.append(MealPlanRecipeBatch(
                         meal_plan=meal_plan,
                         recipe_batch=batch,
                         ratio=ratio,
                         order=0
-                    )
+                    ))
                 
                 created_meal_plans.append(meal_plan)
+            
+            MealPlanRecipeBatch.objects.bulk_create(links_to_create, batch_size=500)
+        
+        # bulk_create n'émet pas post_save (meal plans ni liens) : invalider explicitement le cache
+        invalidate_meal_plan_cache(request.user.id)
+        invalidate_batch_servings_cache([batch.id])
         
         # Sérialiser les meal plans créés
         from .serializers import MealPlanSerializer
@@ -376,57 +439,71 @@ PHOTO_TYPES = [choice[0] for choice in PostPhoto.PHOTO_TYPE_CHOICES]
 RESTRICTED_PHOTO_TYPES = PostPhoto.UNIQUE_TYPES
 
 
-def calculate_meal_plan_servings(meal_plan, group_meal_plans=None):
+def parse_date_keys(date_keys):
+    """
+    Convertit des clés 'YYYY-MM-DD' en dates, en ignorant les clés invalides
+    et les doublons (l'ordre d'origine est conservé).
+    """
+    target_dates = {}
+    for date_key in date_keys:
+        try:
+            target_dates[datetime.strptime(date_key, '%Y-%m-%d').date()] = None
+        except (ValueError, TypeError):
+            continue
+    return list(target_dates)
+
+
+def calculate_batches_servings(batch_ids):
     """
-    Calcule le nombre total de personnes pour un meal plan.
+    Calcule total_servings_batch pour plusieurs batches.
     
-    Args:
-        meal_plan: Le meal plan pour lequel calculer
-        group_meal_plans: Liste optionnelle de meal plans du même groupe (si groupé)
+    Les totaux sont mis en cache par batch ; seuls les batches absents du cache sont
+    recalculés (deux requêtes agrégées). Les signaux invalident l'entrée d'un batch
+    quand ses liens, les convives ou les invitations de ses meal plans changent.
     
     Returns:
-        int: Nombre total de personnes (total_servings)
+        dict: {batch_id: total_servings}
     """
-    # Si on a déjà _total_servings calculé, l'utiliser
-    if hasattr(meal_plan, '_total_servings'):
-        return meal_plan._total_servings
-    
-    # Si group_meal_plans est fourni, calculer pour un groupe
-    if group_meal_plans and len(group_meal_plans) > 1:
-        # Meal plan groupé : calculer total_servings
-        total_guest_count = sum(mp.guest_count or 0 for mp in group_meal_plans)
-        all_participants = []
-        
-        for mp in group_meal_plans:
-            invitations = mp.invitations.all() if hasattr(mp, 'invitations') else []
-            for inv in invitations:
-                all_participants.append({
-                    'user': inv.invitee,
-                    'status': inv.status,
-                })
-        
-        # Compter les participants actifs (accepted ou pending) en dédupliquant par utilisateur
-        # Un utilisateur invité sur plusieurs meal plans du groupe ne compte qu'une seule fois
-        active_participants_by_user = {}
-        for p in all_participants:
-            if p.get('status') in ['accepted', 'pending']:
-                user_id = p['user'].id if hasattr(p['user'], 'id') else p['user']['id'] if isinstance(p['user'], dict) else None
-                if user_id:
-                    # Garder le meilleur statut (accepted > pending)
-                    existing_status = active_participants_by_user.get(user_id)
-                    if not existing_status or (p.get('status') == 'accepted' and existing_status != 'accepted'):
-                        active_participants_by_user[user_id] = p.get('status')
-        
-        active_participants_count = len(active_participants_by_user)
-        days_count = len(group_meal_plans)
-        return days_count + active_participants_count + total_guest_count
-    
-    # Meal plan simple : 1 (créateur) + participants actifs + guests
-    participants_count = meal_plan.invitations.filter(
-        status__in=['accepted', 'pending']
-    ).count() if hasattr(meal_plan, 'invitations') else 0
-    guest_count = meal_plan.guest_count or 0
-    return 1 + participants_count + guest_count
+    keys = {batch_servings_cache_key(batch_id): batch_id for batch_id in batch_ids}
+    totals = {keys[key]: value for key, value in cache.get_many(keys).items()}
+    missing_ids = [batch_id for batch_id in batch_ids if batch_id not in totals]
+    if missing_ids:
+        computed = _aggregate_batches_servings(missing_ids)
+        cache.set_many(
+            {batch_servings_cache_key(batch_id): total for batch_id, total in computed.items()},
+            BATCH_SERVINGS_CACHE_TTL,
+        )
+        totals.update(computed)
+    return totals
+
+
+def _aggregate_batches_servings(batch_ids):
+    """
+    Somme, sur TOUS les meal plans de chaque batch, de 1 (créateur) + guest_count
+    + invitations actives (accepted ou pending).
+    """
+    totals = {batch_id: 0 for batch_id in batch_ids}
+    if not totals:
+        return totals
+    
+    # 1 par meal plan + guest_count (un MealPlanRecipeBatch par couple meal plan/batch)
+    days_and_guests = MealPlanRecipeBatch.objects.filter(
+        recipe_batch_id__in=totals.keys()
+    ).values('recipe_batch_id').annotate(
+        days=Count('meal_plan_id'),
+        guests=Sum('meal_plan__guest_count'),
+    )
+    for row in days_and_guests:
+        totals[row['recipe_batch_id']] += row['days'] + (row['guests'] or 0)
+    
+    # Invitations actives, comptées par meal plan
+    active_participants = MealPlanRecipeBatch.objects.filter(
+        recipe_batch_id__in=totals.keys(),
+        meal_plan__invitations__status__in=['accepted', 'pending'],
+    ).values('recipe_batch_id').annotate(participants=Count('meal_plan__invitations'))
+    for row in active_participants:
+        totals[row['recipe_batch_id']] += row['participants']
+    return totals
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -545,8 +622,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
                                 return f"J+{delta}"
                             return f"J{delta}"
                         
+                        # 1re passe : batches candidats, depuis les liens déjà préchargés
+                        candidates = []
                         for meal_plan in nearby_meal_plans:
-                            for mprb in meal_plan.meal_plan_recipe_batches.all().select_related('recipe_batch__recipe', 'recipe_batch__created_by'):
+                            for mprb in meal_plan.meal_plan_recipe_batches.all():
                                 batch = mprb.recipe_batch
                                 if not batch or not batch.recipe:
                                     continue
@@ -556,43 +635,46 @@ class RecipeViewSet(viewsets.ModelViewSet):
                                 if batch.created_by_id != request.user.id:
                                     continue
                                 seen_batches.add(batch.id)
-                                
-                                recipe = batch.recipe
-                                recipe_data = RecipeLightSerializer(recipe).data
-                                # Nettoyer les infos non nécessaires
-                                recipe_data.pop('meal_type', None)
-                                recipe_data.pop('meal_type_display', None)
-                                recipe_data.pop('difficulty', None)
-                                recipe_data.pop('difficulty_display', None)
-                                
-                                # Dates liées à ce batch (toutes les meal plans qui l’utilisent)
-                                related_mps = MealPlan.objects.filter(
-                                    meal_plan_recipe_batches__recipe_batch_id=batch.id
-                                ).distinct()
-                                grouped_dates = sorted({mp.date for mp in related_mps})
-                                earliest_date = grouped_dates[0] if grouped_dates else meal_plan.date
-                                
-                                # Nombre total de personnes : somme des servings de chaque meal plan lié
-                                total_servings = 0
-                                for mp in related_mps:
-                                    total_servings += calculate_meal_plan_servings(mp)
-                                
-                                suggestion = {
-                                    **recipe_data,
-                                    'is_batch': True,
-                                    'batch_id': batch.id,
-                                    'batch_earliest_date': earliest_date.strftime('%Y-%m-%d'),
-                                    'badge_label': badge_label_for_date(target_date, earliest_date),
-                                    'total_servings': total_servings,
-                                    'meal_time': meal_plan.meal_time,
-                                    'original_date': earliest_date.strftime('%Y-%m-%d'),
-                                    'earliest_date': earliest_date.strftime('%Y-%m-%d'),
-                                    'groupedDates': [d.isoformat() for d in grouped_dates],
-                                }
-                                batch_suggestions.append(suggestion)
-                                
-                                if recipe_data.get('id'):
-                                    suggested_recipe_ids.add(recipe_data['id'])
+                                candidates.append((meal_plan, batch))
+                        
+                        # Dates et nombre total de personnes de tous les batches en une fois,
+                        # au lieu d'une requête MealPlan + un calcul par meal plan pour chaque batch
+                        candidate_batch_ids = [batch.id for _, batch in candidates]
+                        dates_by_batch = get_batch_dates_map(candidate_batch_ids)
+                        servings_by_batch = calculate_batches_servings(candidate_batch_ids)
+                        
+                        for meal_plan, batch in candidates:
+                            recipe = batch.recipe
+                            recipe_data = RecipeLightSerializer(recipe).data
+                            # Nettoyer les infos non nécessaires
+                            recipe_data.pop('meal_type', None)
+                            recipe_data.pop('meal_type_display', None)
+                            recipe_data.pop('difficulty', None)
+                            recipe_data.pop('difficulty_display', None)
+                            
+                            # Dates liées à ce batch (toutes les meal plans qui l’utilisent)
+                            grouped_dates = sorted({date.fromisoformat(d) for d in dates_by_batch.get(batch.id, [])})
+                            earliest_date = grouped_dates[0] if grouped_dates else meal_plan.date
+                            
+                            # Nombre total de personnes : somme des servings de chaque meal plan lié
+                            total_servings = servings_by_batch.get(batch.id, 0)
+                            
+                            suggestion = {
+                                **recipe_data,
+                                'is_batch': True,
+                                'batch_id': batch.id,
+                                'batch_earliest_date': earliest_date.strftime('%Y-%m-%d'),
+                                'badge_label': badge_label_for_date(target_date, earliest_date),
+                                'total_servings': total_servings,
+                                'meal_time': meal_plan.meal_time,
+                                'original_date': earliest_date.strftime('%Y-%m-%d'),
+                                'earliest_date': earliest_date.strftime('%Y-%m-%d'),
+                                'groupedDates': [d.isoformat() for d in grouped_dates],
+                            }
+                            batch_suggestions.append(suggestion)
+                            
+                            if recipe_data.get('id'):
+                                suggested_recipe_ids.add(recipe_data['id'])
                         
                         # Mélanger les suggestions et limiter à 3
                         import random
@@ -623,8 +705,6 @@ class RecipeViewSet(viewsets.ModelViewSet):
     
     def _get_nearby_meal_plans(self, user, target_date, meal_time, max_days=4, limit=10):
         """Récupérer les meal plans non cuisinés des jours passés, du jour même (autre meal_time), et futurs"""
-        from django.db.models import Prefetch, Q
-        from .models import MealPlanRecipeBatch
         from django.utils import timezone
         from datetime import timedelta
         
@@ -648,7 +728,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         ).exclude(
             meal_plan_recipe_batches__recipe_batch__cooking_progresses__status='in_progress'
         ).prefetch_related(
-            Prefetch('meal_plan_recipe_batches', queryset=MealPlanRecipeBatch.objects.select_related('recipe_batch__recipe').order_by('order')),
+            meal_plan_recipe_batches_prefetch(),
             'invitations',
             # Les groupes sont maintenant au niveau des recettes, pas des meal plans
         ).order_by('-date', 'meal_time').distinct()[:limit]  # Trier par date décroissante puis meal_time
@@ -757,9 +837,6 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """
         Endpoint pour formaliser une recette brute avec l'IA et la créer en DB
         """
-        import logging
-        logger = logging.getLogger(__name__)
-        
         process_start = perf_counter()
         logger.info(
             "[RecipeFormalize] Appel entrant user=%s payload_keys=%s",
@@ -823,7 +900,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
-            logger.error(f"Erreur lors de la formalisation de la recette: {e}", exc_info=True)
+            logger.error("Erreur lors de la formalisation de la recette: %s", e, exc_info=True)
             return Response(
                 {'error': f'Erreur lors de la formalisation: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -851,7 +928,6 @@ class RecipeViewSet(viewsets.ModelViewSet):
         Importe une recette depuis une URL externe (Bergamot, Marmiton, etc.)
         L'extraction et la formalisation sont faites de manière asynchrone via Celery
         """
-        logger = logging.getLogger(__name__)
         url = request.data.get('url', '').strip()
         if not url:
             return Response(
@@ -892,7 +968,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
             )
             
         except Exception as e:
-            logger.error(f"Erreur lors de la soumission de l'import depuis URL: {e}", exc_info=True)
+            logger.error("Erreur lors de la soumission de l'import depuis URL: %s", e, exc_info=True)
             return Response(
                 {'error': f'Erreur lors de la soumission: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -932,14 +1008,13 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def get_recipe_image_presigned_url(self, request):
         """Générer une URL pré-signée pour uploader une image de recette directement vers S3"""
         try:
-            logger = logging.getLogger(__name__)
             logger.info(
                 "[RecipeImages] Demande de presigned URL user=%s payload=%s",
                 request.user.id,
                 request.data
             )
             s3_client = build_s3_client()
-            bucket_name = settings.AWS_BUCKET
+            bucket_name = S3_BUCKET
             
             if not bucket_name:
                 return Response(
@@ -948,7 +1023,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 )
             
             # Générer un nom de fichier unique pour l'image de recette
-            unique_id = str(uuid.uuid4()).replace('-', '')
+            unique_id = secrets.token_hex(16)
             file_name = f"recipes/{request.user.id}/{unique_id}.jpg"
             
             # Générer l'URL pré-signée pour l'upload (valide 5 minutes)
@@ -963,7 +1038,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
                     ExpiresIn=300  # 5 minutes
                 )
             except Exception as url_error:
-                logger.error(f"Erreur lors de la génération de l'URL pré-signée: {url_error}")
+                logger.error("Erreur lors de la génération de l'URL pré-signée: %s", url_error)
                 # Essayer sans ContentType si ça échoue
                 presigned_url = s3_client.generate_presigned_url(
                     'put_object',
@@ -985,7 +1060,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
-            logger.error(f"Erreur lors de la génération de l'URL pré-signée pour l'image de recette: {e}", exc_info=True)
+            logger.error("Erreur lors de la génération de l'URL pré-signée pour l'image de recette: %s", e, exc_info=True)
             return Response(
                 {'error': f'Erreur lors de la génération de l\'URL: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1007,9 +1082,9 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Rechercher des ingrédients"""
+        """Rechercher des ingrédients (autocomplete par préfixe, index trigram sur name)"""
         query = request.query_params.get('q', '')
-        ingredients = Ingredient.objects.filter(name__icontains=query)[:10]
+        ingredients = Ingredient.objects.filter(name__istartswith=query).order_by('name')[:10]
         serializer = self.get_serializer(ingredients, many=True)
         return Response(serializer.data)
 
@@ -1018,6 +1093,7 @@ class MealPlanViewSet(viewsets.ModelViewSet):
     """ViewSet pour les repas planifiés"""
     serializer_class = MealPlanSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = MealPlanPageNumberPagination
     
     def get_serializer_class(self):
         # Utiliser des serializers adaptés par action
@@ -1043,8 +1119,6 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         - Filtrer côté DB avec date__gte/date__lte si fournis
         - Éviter les N+1 queries via select_related/prefetch_related
         """
-        from django.db.models import Case, When, IntegerField
-        
         qs = MealPlan.objects.filter(user=self.request.user)
         
         # Filtres de date (format YYYY-MM-DD)
@@ -1072,18 +1146,10 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         confirmed = self.request.query_params.get('confirmed')
         if confirmed in ('true', 'false'):
             qs = qs.filter(confirmed=(confirmed == 'true'))
-        # Définir l'ordre des meal_time : lunch (0) avant dinner (1)
-        meal_time_order = Case(
-            When(meal_time='lunch', then=0),
-            When(meal_time='dinner', then=1),
-            default=2,
-            output_field=IntegerField(),
-        )
+        # Ordre des meal_time : lunch (0) avant dinner (1), via la colonne générée meal_time_rank
+        # (indexée avec user/date : pas de CASE évalué puis trié à chaque requête)
         
         # Chargement optimisé des relations utilisées par le serializer
-        from django.db.models import Prefetch
-        from .models import MealPlanRecipeBatch, StepIngredient
-        
         # Détecter le mode minimal
         is_minimal = self.request.query_params.get('minimal', '').lower() == 'true'
         
@@ -1094,28 +1160,37 @@ class MealPlanViewSet(viewsets.ModelViewSet):
                 # Utiliser only() pour limiter les champs chargés de la DB
                 qs = qs.only(
                 'id', 'date', 'meal_time', 'meal_type', 'confirmed'
-                ).order_by('date', meal_time_order)
+                ).order_by('date', 'meal_time_rank')
             else:
-                # Mode complet : précharger les relations nécessaires (plus de recipe directe)
-                qs = qs.prefetch_related(
-                    Prefetch('invitations', queryset=MealInvitation.objects.select_related('invitee')),
-                    Prefetch('meal_plan_recipe_batches', queryset=MealPlanRecipeBatch.objects.select_related('recipe_batch__recipe').order_by('order')),
-                ).order_by('date', meal_time_order)
-        elif self.action in ['by_date']:
-            qs = qs.select_related('user').prefetch_related(
-                Prefetch('invitations', queryset=MealInvitation.objects.select_related('invitee')),
-                Prefetch('meal_plan_recipe_batches', queryset=MealPlanRecipeBatch.objects.select_related('recipe_batch__recipe').order_by('order')),
-            ).order_by('date', meal_time_order)
+                # Mode complet : seulement les colonnes et relations lues par MealPlanRangeListSerializer
+                # (il ne sérialise pas les invitations)
+                qs = qs.only(*MEAL_PLAN_LIST_FIELDS).prefetch_related(
+                    meal_plan_recipe_batches_prefetch(),
+                ).order_by('date', 'meal_time_rank')
+        elif self.action == 'add_recipes':
+            # add_recipes ne lit que l'id (ligne verrouillée) puis recharge le meal plan avec
+            # ses relations (_get_meal_plans_with_prefetch) : pas de prefetch ici
+            qs = qs.only('id', 'user')
         elif self.action in ['by_week', 'by_dates', 'bulk']:
+            qs = qs.select_related('user').only(
+                *MEAL_PLAN_LIST_FIELDS, *MEAL_PLAN_LIST_USER_FIELDS
+            ).prefetch_related(
+                meal_plan_recipe_batches_prefetch(),
+            ).order_by('date', 'meal_time_rank')
+        elif self.action == 'by_date':
+            # Une seule journée : invitations limitées aux colonnes lues par le serializer
             qs = qs.select_related('user').prefetch_related(
-                Prefetch('meal_plan_recipe_batches', queryset=MealPlanRecipeBatch.objects.select_related('recipe_batch__recipe').order_by('order')),
-            ).order_by('date', meal_time_order)
+                Prefetch('invitations', queryset=MealInvitation.objects.select_related('invitee').only(
+                    'id', 'status', 'meal_plan_id', 'invitee', 'invitee__id', 'invitee__username', 'invitee__avatar_url'
+                )),
+                meal_plan_recipe_batches_prefetch(),
+            ).order_by('meal_time_rank')
         else:
             # Pour retrieve : préfetch minimal (pas de steps ni recipe_ingredients détaillés)
             qs = qs.select_related('user').prefetch_related(
                 Prefetch('invitations', queryset=MealInvitation.objects.select_related('invitee')),
-                Prefetch('meal_plan_recipe_batches', queryset=MealPlanRecipeBatch.objects.select_related('recipe_batch__recipe').order_by('order')),
-            ).order_by('date', meal_time_order)
+                meal_plan_recipe_batches_prefetch(),
+            ).order_by('date', 'meal_time_rank')
         return qs
     
     def _get_meal_plans_with_prefetch(self, meal_plan_ids):
@@ -1127,11 +1202,61 @@ class MealPlanViewSet(viewsets.ModelViewSet):
             'user'
         ).prefetch_related(
             Prefetch('invitations', queryset=MealInvitation.objects.select_related('invitee')),
-            Prefetch(
-                'meal_plan_recipe_batches',
-                queryset=MealPlanRecipeBatch.objects.select_related('recipe_batch__recipe').order_by('order')
-            ),
+            meal_plan_recipe_batches_prefetch(),
         )
+    def _get_context_with_batch_dates(self, meal_plans):
+        """
+        Contexte serializer avec les dates de tous les batches de la page chargées en une requête
+        (évite une requête groupedDates par meal plan et par recette).
+        """
+        context = self.get_serializer_context()
+        batch_ids = {
+            batch_id
+            for mp in meal_plans
+            for batch_id in get_recipe_batch_ids(mp)
+        }
+        context['batch_dates'] = get_batch_dates_map(batch_ids)
+        return context
+
+    def _streaming_json_list(self, objects, chunk_size=25):
+        """
+        Réponse JSON (liste) streamée : les objets sont sérialisés et encodés par paquets de
+        chunk_size, le premier octet part avant la fin de la sérialisation.
+        """
+        encoder = JSONEncoder()
+        
+        def generate():
+            yield '['
+            iterator = iter(objects)
+            separator = ''
+            while True:
+                chunk = list(islice(iterator, chunk_size))
+                if not chunk:
+                    break
+                data = self.get_serializer(chunk, many=True).data
+                yield separator + encoder.encode(list(data))[1:-1]
+                separator = ','
+            yield ']'
+        
+        return StreamingHttpResponse(generate(), content_type='application/json')
+
+    def _cached_list_response(self, build_data, probe=None, timeout=MEAL_PLAN_CACHE_TTL):
+        """
+        Réponse GET idempotente mise en cache quelques secondes par (utilisateur, action, query params).
+        Invalidée par les signaux d'écriture sur MealPlan / MealPlanRecipeBatch / MealInvitation.
+        probe : valeurs lues en base (max updated_at, nombres de lignes) ajoutées à la clé, pour que
+        les insertions / suppressions en masse qui contournent les signaux changent aussi la clé.
+        Un queryset.update() ne touche pas updated_at (auto_now) : seul le TTL le rattrape.
+        """
+        key = get_meal_plan_cache_key(self.request.user.id, self.action, self.request.query_params)
+        if probe is not None:
+            key = f"{key}:{':'.join(str(value) for value in probe)}"
+        data = cache.get(key)
+        if data is None:
+            data = build_data()
+            cache.set(key, data, timeout)
+        return Response(data)
+
     def create(self, request, *args, **kwargs):
         """
         Créer un ou plusieurs meal plans. Pour chaque recette, un MealPlanRecipeGroup est créé
@@ -1144,20 +1269,23 @@ class MealPlanViewSet(viewsets.ModelViewSet):
             serializer.is_valid(raise_exception=True)
             with transaction.atomic():
                 meal_plans = serializer.save()
-            ordered_ids = [meal_plan.id for meal_plan in meal_plans]
-            prefetched = list(self._get_meal_plans_with_prefetch(ordered_ids))
-            prefetched.sort(key=lambda mp: ordered_ids.index(mp.id))
-            response_serializer = self.get_serializer(prefetched, many=True)
-            return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+        else:
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            with transaction.atomic():
+                meal_plans = [serializer.save()]
         
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        with transaction.atomic():
-            meal_plan = serializer.save()
-        prefetched = self._get_meal_plans_with_prefetch([meal_plan.id])
-        response_serializer = self.get_serializer(prefetched[0])
-        headers = self.get_success_headers(response_serializer.data)
-        return Response(response_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+        # Réponse toujours sérialisée via un seul ListSerializer (many=True), même pour un objet
+        ordered_ids = [meal_plan.id for meal_plan in meal_plans]
+        prefetched = list(self._get_meal_plans_with_prefetch(ordered_ids))
+        position_by_id = {mp_id: index for index, mp_id in enumerate(ordered_ids)}
+        prefetched.sort(key=lambda mp: position_by_id[mp.id])
+        response_data = self.get_serializer(prefetched, many=True).data
+        
+        if is_bulk:
+            return Response(response_data, status=status.HTTP_201_CREATED)
+        headers = self.get_success_headers(response_data[0])
+        return Response(response_data[0], status=status.HTTP_201_CREATED, headers=headers)
     
     def update(self, request, *args, **kwargs):
         """
@@ -1183,28 +1311,38 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         Ajouter des recettes via batches à un meal plan sans supprimer les existantes.
         - recipe_ids : liste obligatoire (crée un batch par recette)
         - recipe_ratios : dict optionnel {recipe_id: ratio}
+        Réponse légère (liens créés ou mis à jour) ; ?full=1 renvoie le meal plan sérialisé.
         """
 
-        meal_plan = self.get_object()
         recipe_ids = request.data.get('recipe_ids') or []
         recipe_ratios = request.data.get('recipe_ratios') or {}
 
         if not isinstance(recipe_ids, list) or len(recipe_ids) == 0:
             return Response({'error': 'recipe_ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
 
-        existing_mprs = {mpr.recipe_batch.recipe_id: mpr for mpr in MealPlanRecipeBatch.objects.filter(meal_plan=meal_plan).select_related('recipe_batch')}
-        current_max_order = MealPlanRecipeBatch.objects.filter(meal_plan=meal_plan).aggregate(Max('order'))['order__max'] or 0
         default_ratio = Decimal('1.0') / Decimal(str(len(recipe_ids))) if recipe_ids else Decimal('1.0')
 
         created_mprs = []
+        touched_mprs = []
         with transaction.atomic():
-            for idx, recipe_id in enumerate(recipe_ids):
-                # Vérifier que la recette existe
-                try:
-                    Recipe.objects.get(id=recipe_id)
-                except Recipe.DoesNotExist:
+            # Verrou sur la ligne du meal plan : deux add_recipes concurrents sont sérialisés,
+            # ni doublon de batch pour une même recette ni ordre en double
+            meal_plan = get_object_or_404(self.get_queryset().select_for_update(), pk=pk)
+
+            # Vérifier en une requête que les recettes existent, sans charger les instances,
+            # avant toute écriture (comparaison en str : les ids peuvent arriver en int ou en
+            # chaîne dans le JSON)
+            existing_recipe_ids = {str(rid) for rid in Recipe.objects.filter(id__in=recipe_ids).values_list('id', flat=True)}
+            for recipe_id in recipe_ids:
+                if str(recipe_id) not in existing_recipe_ids:
                     return Response({'error': f'recipe {recipe_id} not found'}, status=status.HTTP_404_NOT_FOUND)
 
+            existing_links = list(MealPlanRecipeBatch.objects.filter(meal_plan=meal_plan).select_related('recipe_batch'))
+            existing_mprs = {mpr.recipe_batch.recipe_id: mpr for mpr in existing_links}
+            # MAX(order) déduit des liens déjà chargés : pas de requête d'agrégat séparée
+            current_max_order = max((mpr.order for mpr in existing_links), default=0)
+
+            for recipe_id in recipe_ids:
                 ratio_value = recipe_ratios.get(str(recipe_id)) or recipe_ratios.get(recipe_id) or default_ratio
                 ratio_decimal = Decimal(str(ratio_value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
@@ -1221,49 +1359,25 @@ class MealPlanViewSet(viewsets.ModelViewSet):
                         order=current_max_order + len(created_mprs) + 1
                     )
                     created_mprs.append(mpr)
+                touched_mprs.append((recipe_id, mpr))
 
-        prefetched = self._get_meal_plans_with_prefetch([meal_plan.id])
-        response_serializer = self.get_serializer(prefetched[0])
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
-    
-    def list(self, request, *args, **kwargs):
-        """
-        Log détaillé des temps pour diagnostiquer lenteurs:
-        - construction/évaluation du queryset
-        - sérialisation
-        """
-        if settings.DEBUG:
-            from django.db import reset_queries
-            reset_queries()
-            t0 = perf_counter()
-        
-        queryset = self.get_queryset()
-        
-        if settings.DEBUG:
-            t_qs_start = perf_counter()
-            # Forcer l'évaluation pour mesurer le temps DB
-            objects = list(queryset)
-            t_qs_end = perf_counter()
-            db_queries = len(connection.queries)
-            db_time_ms = sum(float(q.get('time', 0)) for q in connection.queries) * 1000
-        else:
-            objects = list(queryset)
-        
-        # Le calcul de total_servings est maintenant fait dans le serializer
-        # en sommant les servings de chaque recette (groupée ou non)
-        # On n'a plus besoin de pré-calculer ici
-        
-        serializer = self.get_serializer(objects, many=True)
-        
-        if settings.DEBUG:
-            t_ser_end = perf_counter()
-            total_ms = (t_ser_end - t0) * 1000
-            qs_ms = (t_qs_end - t_qs_start) * 1000 if 't_qs_end' in locals() else 0
-            ser_ms = (t_ser_end - (t_qs_end if 't_qs_end' in locals() else t0)) * 1000
-            print(f"[MealPlanViewSet.list] items={len(objects)} qs_ms={qs_ms:.1f} ser_ms={ser_ms:.1f} "
-                  f"db_queries={db_queries} db_time_ms={db_time_ms:.1f} total_ms={total_ms:.1f}")
-        
-        return Response(serializer.data)
+        if request.query_params.get('full') == '1':
+            prefetched = self._get_meal_plans_with_prefetch([meal_plan.id])
+            response_serializer = self.get_serializer(prefetched[0])
+            return Response(response_serializer.data, status=status.HTTP_200_OK)
+        return Response({
+            'id': meal_plan.id,
+            'recipe_batches': [
+                {
+                    'id': mpr.id,
+                    'recipe_batch_id': mpr.recipe_batch_id,
+                    'recipe_id': int(recipe_id),
+                    'ratio': float(mpr.ratio),
+                    'order': mpr.order,
+                }
+                for recipe_id, mpr in touched_mprs
+            ],
+        }, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['get'])
     def cooked(self, request):
@@ -1272,30 +1386,28 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         Un batch est "cuisiné" si is_cooked=True
         """
         from django.core.paginator import Paginator, EmptyPage
-        from django.db.models import Prefetch, Q
         
         # Filtrer les batches cuisinés de l'utilisateur :
         # 1. Batches créés par l'utilisateur ET is_cooked=True
         # 2. OU batches liés à des meal plans accessibles ET is_cooked=True
         # Cela garantit que tous les batches cuisinés de l'utilisateur sont retournés,
         # même s'ils ne sont plus liés à un meal plan accessible
+        # Exists() plutôt qu'une jointure sur meal_plan_recipe_batches : pas de lignes
+        # dupliquées à dédoublonner avec DISTINCT sur toutes les colonnes
         accessible_meal_plan_filter = get_accessible_meal_plan_filter(request.user)
+        linked_to_accessible_meal_plan = Exists(
+            MealPlanRecipeBatch.objects.filter(
+                recipe_batch=OuterRef('pk'),
+                meal_plan__in=MealPlan.objects.filter(accessible_meal_plan_filter),
+            )
+        )
         qs = RecipeBatch.objects.filter(
-            recipe__isnull=False
+            recipe__isnull=False,
+            is_cooked=True,
         ).filter(
-            (
-                # Batches créés par l'utilisateur ET is_cooked=True
-                Q(created_by=request.user) & Q(is_cooked=True)
-            ) | (
-                # OU batches liés à des meal plans accessibles ET is_cooked=True
-                Q(meal_plan_recipe_batches__meal_plan__in=MealPlan.objects.filter(
-                    accessible_meal_plan_filter
-                )) & Q(is_cooked=True)
-            )
-        ).distinct().select_related('recipe').prefetch_related(
-            Prefetch('posts', queryset=Post.objects.filter(is_published=True)),
-            Prefetch('meal_plan_recipe_batches', queryset=MealPlanRecipeBatch.objects.select_related('meal_plan'))
-        ).order_by('-created_at')
+            # Batches créés par l'utilisateur OU liés à des meal plans accessibles
+            Q(created_by=request.user) | linked_to_accessible_meal_plan
+        ).select_related('recipe').order_by('-created_at')
         
         # Filtrer par recette si demandé
         recipe_id = request.query_params.get('recipe')
@@ -1315,32 +1427,62 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         except EmptyPage:
             batches = paginator.page(paginator.num_pages)
         
+        # Meal plans accessibles de la page : projection values() groupée par batch
+        # plutôt qu'une requête MealPlan (et un count d'invitations) par batch
+        page_batch_ids = [batch.id for batch in batches]
+        meal_rows_by_batch = {batch_id: [] for batch_id in page_batch_ids}
+        meal_rows = MealPlanRecipeBatch.objects.filter(
+            recipe_batch_id__in=page_batch_ids,
+            meal_plan_id__in=MealPlan.objects.filter(accessible_meal_plan_filter).values('id'),
+        ).values(
+            'recipe_batch_id', 'meal_plan_id', 'meal_plan__date', 'meal_plan__meal_time', 'meal_plan__guest_count'
+        ).order_by('-meal_plan__date', 'meal_plan__meal_time')
+        for row in meal_rows:
+            meal_rows_by_batch[row['recipe_batch_id']].append(row)
+        active_participants_by_meal_plan = dict(
+            MealInvitation.objects.filter(
+                meal_plan_id__in={row['meal_plan_id'] for rows in meal_rows_by_batch.values() for row in rows},
+                status__in=['accepted', 'pending'],
+            ).values('meal_plan_id').annotate(n=Count('id')).values_list('meal_plan_id', 'n')
+        )
+        
+        # Post publié le plus récent et sa première photo, résolus pour toute la page en deux requêtes
+        latest_post_id_by_batch = {}
+        for post_id, batch_id in Post.objects.filter(
+            recipe_batch_id__in=page_batch_ids, is_published=True
+        ).order_by('-created_at').values_list('id', 'recipe_batch_id'):
+            latest_post_id_by_batch.setdefault(batch_id, post_id)
+        cover_photo_by_post = {}
+        for photo in PostPhoto.objects.filter(
+            post_id__in=latest_post_id_by_batch.values()
+        ).only('id', 'post_id', 'image_path'):  # triées par order, created_at
+            cover_photo_by_post.setdefault(photo.post_id, photo)
+        
         results = []
-        accessible_meal_plan_filter = get_accessible_meal_plan_filter(request.user)
         for batch in batches:
-            # Filtrer les meal plans accessibles par l'utilisateur pour ce batch
-            meal_plans = MealPlan.objects.filter(
-                meal_plan_recipe_batches__recipe_batch=batch
-            ).filter(accessible_meal_plan_filter).distinct()
-            grouped_dates = sorted({mp.date.isoformat() for mp in meal_plans})
-            total_servings = 0
-            meals = []
-            for mp in meal_plans:
-                total_servings += calculate_meal_plan_servings(mp)
-                meals.append({
-                    'id': mp.id,
-                    'date': mp.date,
-                    'meal_time': mp.meal_time,
+            rows = meal_rows_by_batch[batch.id]
+            grouped_dates = sorted({row['meal_plan__date'].isoformat() for row in rows})
+            # Même calcul que _aggregate_batches_servings : 1 + participants actifs + guests
+            total_servings = sum(
+                1 + active_participants_by_meal_plan.get(row['meal_plan_id'], 0) + (row['meal_plan__guest_count'] or 0)
+                for row in rows
+            )
+            meals = [
+                {
+                    'id': row['meal_plan_id'],
+                    'date': row['meal_plan__date'],
+                    'meal_time': row['meal_plan__meal_time'],
                     'is_cooked': batch.is_cooked,
-                })
+                }
+                for row in rows
+            ]
             
-            has_published_post = batch.posts.filter(is_published=True).exists()
+            post_id = latest_post_id_by_batch.get(batch.id)
+            has_published_post = post_id is not None
             photo_url = None
-            if has_published_post:
-                post = batch.posts.filter(is_published=True).first()
-                first_photo = post.photos.order_by('order').first() if hasattr(post, 'photos') else None
-                if first_photo and hasattr(first_photo, 'image_url'):
-                    photo_url = first_photo.image_url
+            first_photo = cover_photo_by_post.get(post_id)
+            if first_photo:
+                photo_url = first_photo.image_url
             if not photo_url and batch.recipe and getattr(batch.recipe, 'image_url', None):
                 photo_url = batch.recipe.image_url
             
@@ -1348,7 +1490,7 @@ class MealPlanViewSet(viewsets.ModelViewSet):
             payload.update({
                 'groupedDates': grouped_dates,
                 'total_servings_batch': total_servings,
-                'meal_plan_ids': [mp.id for mp in meal_plans],
+                'meal_plan_ids': [row['meal_plan_id'] for row in rows],
                 'meals': meals,
                 'is_shared': has_published_post,
                 'photo_url': photo_url,
@@ -1373,20 +1515,22 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         dates_param = request.query_params.get('dates', '')
         if not dates_param:
             return Response({'error': 'dates is required (comma-separated YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            date_strings = [d.strip() for d in dates_param.split(',') if d.strip()]
-            # Validation simple du format, sans construire des objets date coûteux
-            for ds in date_strings:
-                if len(ds) != 10 or ds[4] != '-' or ds[7] != '-':
-                    raise ValueError('invalid date format')
-        except Exception:
+        # Validation du format par regex compilée (sans construire d'objets date), dates dédoublonnées
+        date_strings = frozenset(d.strip() for d in dates_param.split(',') if d.strip())
+        if not all(_DATE_RE.match(ds) for ds in date_strings):
             return Response({'error': 'Invalid dates format. Use comma-separated YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
         
-        qs = MealPlan.objects.filter(user=request.user, date__in=date_strings).select_related(
-            'user', 'recipe'
-        ).order_by('-date', 'meal_time')
-        serializer = self.get_serializer(qs, many=True)
-        return Response(serializer.data)
+        def build_data():
+            meal_plans = list(
+                MealPlan.objects.filter(user=request.user, date__in=date_strings).select_related(
+                    'user'
+                ).only(*MEAL_PLAN_LIST_FIELDS, *MEAL_PLAN_LIST_USER_FIELDS).prefetch_related(
+                    meal_plan_recipe_batches_prefetch(),
+                ).order_by('-date', 'meal_time')
+            )
+            return self.get_serializer(meal_plans, many=True, context=self._get_context_with_batch_dates(meal_plans)).data
+        
+        return self._cached_list_response(build_data)
     
     @action(detail=False, methods=['get'])
     def bulk(self, request):
@@ -1402,52 +1546,27 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         except ValueError:
             return Response({'error': 'ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
         
-        qs = MealPlan.objects.filter(user=request.user, id__in=ids).select_related(
-            'user', 'recipe'
-        )
-        serializer = self.get_serializer(qs, many=True)
-        return Response(serializer.data)
+        def build_data():
+            meal_plans = list(
+                MealPlan.objects.filter(user=request.user, id__in=ids).select_related(
+                    'user'
+                ).only(*MEAL_PLAN_LIST_FIELDS, *MEAL_PLAN_LIST_USER_FIELDS).prefetch_related(
+                    meal_plan_recipe_batches_prefetch(),
+                )
+            )
+            return self.get_serializer(meal_plans, many=True, context=self._get_context_with_batch_dates(meal_plans)).data
+        
+        return self._cached_list_response(build_data)
     
+    @debug_timing('MealPlanViewSet.retrieve')
     def retrieve(self, request, *args, **kwargs):
-        """Logging détaillé pour le GET d'un objet"""
-        if settings.DEBUG:
-            from django.db import reset_queries
-            reset_queries()
-            t0 = perf_counter()
-        
+        """Détail d'un meal plan (timing SQL en DEBUG via debug_timing)"""
         instance = self.get_object()
         
-        # DEBUG : Vérifier les invitations chargées
-        if settings.DEBUG:
-            import logging
-            logger = logging.getLogger(__name__)
-            # Vérifier si les invitations sont préchargées
-            invitations_count = instance.invitations.count() if hasattr(instance, 'invitations') else 0
-            logger.debug(f"[MealPlanViewSet.retrieve] Meal plan {instance.id} - invitations count: {invitations_count}")
-            if hasattr(instance, 'invitations'):
-                for inv in instance.invitations.all():
-                    logger.debug(f"  - Invitation {inv.id}: user_id={inv.invitee_id}, status={inv.status}")
-        
         # Les groupes explicites sont retirés au profit des batches
         # (les agrégations se feront via recipe_batch côté serializers)
-        # Si pas de groupe explicite, le meal plan est simple
         # Le serializer calculera total_servings automatiquement (1 + participants + guest_count)
-        
-        if settings.DEBUG:
-            t_qs_end = perf_counter()
-            db_queries = len(connection.queries)
-            db_time_ms = sum(float(q.get('time', 0)) for q in connection.queries) * 1000
-        
         serializer = self.get_serializer(instance)
-        
-        if settings.DEBUG:
-            t_ser_end = perf_counter()
-            qs_ms = (t_qs_end - t0) * 1000
-            ser_ms = (t_ser_end - t_qs_end) * 1000
-            total_ms = (t_ser_end - t0) * 1000
-            print(f"[MealPlanViewSet.retrieve] qs_ms={qs_ms:.1f} ser_ms={ser_ms:.1f} "
-                  f"db_queries={db_queries} db_time_ms={db_time_ms:.1f} total_ms={total_ms:.1f}")
-        
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
@@ -1459,7 +1578,8 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         meal_plan = self.get_object()
         
         # Récupérer la recette via le batch
-        recipe_batch = meal_plan.meal_plan_recipe_batches.select_related('recipe_batch__recipe').first()
+        # get_object() passe par la branche retrieve de get_queryset (batches + recettes préchargés)
+        recipe_batch = get_first_recipe_batch_link(meal_plan)
         recipe = recipe_batch.recipe_batch.recipe if recipe_batch and recipe_batch.recipe_batch else None
         if not recipe:
             return Response({'error': 'No recipe found for this meal plan'}, status=status.HTTP_404_NOT_FOUND)
@@ -1484,14 +1604,14 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         meal_plan = self.get_object()
         
         # Récupérer la recette via le batch
-        recipe_batch = meal_plan.meal_plan_recipe_batches.select_related('recipe_batch__recipe').first()
+        # get_object() passe par la branche retrieve de get_queryset (batches + recettes préchargés)
+        recipe_batch = get_first_recipe_batch_link(meal_plan)
         recipe = recipe_batch.recipe_batch.recipe if recipe_batch and recipe_batch.recipe_batch else None
         if not recipe:
             return Response({'error': 'No recipe found for this meal plan'}, status=status.HTTP_404_NOT_FOUND)
         
         # Charger les recipe_ingredients
         from .models import RecipeIngredient
-        from django.db.models import Prefetch
         
         ingredients = RecipeIngredient.objects.filter(recipe=recipe).select_related('ingredient')
         
@@ -1514,6 +1634,7 @@ class MealPlanViewSet(viewsets.ModelViewSet):
             context['skip_presign'] = True
         return context
     
+    @debug_timing('MealPlanViewSet.list')
     def list(self, request, *args, **kwargs):
         """Liste optimisée avec pagination pour les meal plans"""
         queryset = self.filter_queryset(self.get_queryset())
@@ -1522,18 +1643,20 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         is_minimal = request.query_params.get('minimal', '').lower() == 'true'
         
         if is_minimal:
-            # Mode minimal : pas de pagination, retourner tous les résultats
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data)
+            # Mode minimal : pas de pagination, retourner tous les résultats.
+            # Pas de prefetch dans ce mode : iterator() lit par paquets et la réponse JSON
+            # est envoyée au fil de l'eau, sans construire la liste complète en mémoire.
+            return self._streaming_json_list(queryset.iterator(chunk_size=500))
         
         # Mode complet : utiliser la pagination DRF
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
+            serializer = self.get_serializer(page, many=True, context=self._get_context_with_batch_dates(page))
             return self.get_paginated_response(serializer.data)
         
         # Fallback si pas de pagination
-        serializer = self.get_serializer(queryset, many=True)
+        meal_plans = list(queryset)
+        serializer = self.get_serializer(meal_plans, many=True, context=self._get_context_with_batch_dates(meal_plans))
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
@@ -1548,14 +1671,31 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         except ValueError:
             return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Utiliser get_queryset() pour bénéficier des optimisations (prefetch, etc.)
-        meal_plans = list(self.get_queryset().filter(date=target_date))
-        
-        # Le calcul de total_servings est maintenant fait dans le serializer
-        # en sommant les servings de chaque recette (groupée ou non)
-        
-        serializer = self.get_serializer(meal_plans, many=True)
-        return Response(serializer.data)
+        def build_data():
+            # get_queryset() applique les filtres de liste (meal_time, confirmed, exclude_cooked,
+            # exclude_in_shopping_list) et le prefetch dédié à une journée.
+            # Les dates des batches sont chargées ensuite en une requête (groupedDates).
+            meal_plans = list(self.get_queryset().filter(date=target_date))
+            
+            # Le calcul de total_servings est maintenant fait dans le serializer
+            # en sommant les servings de chaque recette (groupée ou non)
+            return self.get_serializer(meal_plans, many=True, context=self._get_context_with_batch_dates(meal_plans)).data
+        
+        # Sonde d'une requête : un save() sur les repas du jour, leurs liens, batches, recettes
+        # ou invitations, ainsi que tout ajout / retrait de ligne, change la clé de cache.
+        # Les queryset.update() (updated_at inchangé) et les profils des invités ne sont pas
+        # couverts : le TTL court (MEAL_PLAN_CACHE_TTL) borne cette obsolescence.
+        probe = MealPlan.objects.filter(user=request.user, date=target_date).aggregate(
+            meal_plans_updated=Max('updated_at'),
+            meal_plans_count=Count('id', distinct=True),
+            links_updated=Max('meal_plan_recipe_batches__updated_at'),
+            links_count=Count('meal_plan_recipe_batches', distinct=True),
+            batches_updated=Max('meal_plan_recipe_batches__recipe_batch__updated_at'),
+            recipes_updated=Max('meal_plan_recipe_batches__recipe_batch__recipe__updated_at'),
+            invitations_updated=Max('invitations__updated_at'),
+            invitations_count=Count('invitations', distinct=True),
+        )
+        return self._cached_list_response(build_data, probe=probe.values())
     
     @action(detail=False, methods=['get'])
     def by_week(self, request):
@@ -1572,12 +1712,16 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         from datetime import timedelta
         end_date = start_date + timedelta(days=6)
         
-        meal_plans = MealPlan.objects.filter(
-            user=request.user,
-            date__gte=start_date,
-            date__lte=end_date
+        meal_plans = list(
+            MealPlan.objects.filter(
+                user=request.user,
+                date__gte=start_date,
+                date__lte=end_date
+            ).select_related('user').only(
+                *MEAL_PLAN_LIST_FIELDS, *MEAL_PLAN_LIST_USER_FIELDS
+            ).prefetch_related(meal_plan_recipe_batches_prefetch())
         )
-        serializer = self.get_serializer(meal_plans, many=True)
+        serializer = self.get_serializer(meal_plans, many=True, context=self._get_context_with_batch_dates(meal_plans))
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
@@ -1592,17 +1736,26 @@ class MealPlanViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def shared_with_me(self, request):
         """Récupérer les repas partagés avec l'utilisateur connecté"""
-        invitations = MealInvitation.objects.filter(invitee=request.user, status='accepted').select_related('meal_plan', 'meal_plan__user')
-        meal_plans = [inv.meal_plan for inv in invitations]
-        serializer = self.get_serializer(meal_plans, many=True)
+        # Ids dans l'ordre des invitations (plus récentes d'abord), puis meal plans
+        # chargés avec les seules colonnes lues par MealPlanListSerializer
+        meal_plan_ids = list(
+            MealInvitation.objects.filter(invitee=request.user, status='accepted').values_list('meal_plan_id', flat=True)
+        )
+        meal_plans_by_id = MealPlan.objects.select_related('user').only(
+            *MEAL_PLAN_LIST_FIELDS, *MEAL_PLAN_LIST_USER_FIELDS
+        ).prefetch_related(meal_plan_recipe_batches_prefetch()).in_bulk(meal_plan_ids)
+        meal_plans = [meal_plans_by_id[meal_plan_id] for meal_plan_id in meal_plan_ids]
+        serializer = self.get_serializer(meal_plans, many=True, context=self._get_context_with_batch_dates(meal_plans))
         return Response(serializer.data)
 
     @action(detail=True, methods=['get'])
     def photos(self, request, pk=None):
         """Galerie de photos associées au batch (via meal_plan -> recipe_batches)"""
         meal_plan = self.get_object()
-        batch_ids = list(meal_plan.meal_plan_recipe_batches.values_list('recipe_batch_id', flat=True))
-        photos = PostPhoto.objects.filter(recipe_batch_id__in=batch_ids).select_related('step')
+        batch_ids = get_recipe_batch_ids(meal_plan)
+        photos = PostPhoto.objects.filter(recipe_batch_id__in=batch_ids).select_related('step').only(
+            *POST_PHOTO_GALLERY_FIELDS
+        )
         from .serializers import PostPhotoLightSerializer
         serializer = PostPhotoLightSerializer(photos, many=True, context={'request': request})
         return Response(serializer.data)
@@ -1612,7 +1765,7 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         """Récupérer le post publié associé à ce meal_plan"""
         meal_plan = self.get_object()
         try:
-            batch_ids = list(meal_plan.meal_plan_recipe_batches.values_list('recipe_batch_id', flat=True))
+            batch_ids = get_recipe_batch_ids(meal_plan)
             post = Post.objects.filter(recipe_batch_id__in=batch_ids, is_published=True).first()
             if post:
                 from .serializers import PostSerializer
@@ -1641,15 +1794,15 @@ class MealPlanViewSet(viewsets.ModelViewSet):
             return Response({'error': 'You can select up to 10 photos'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Récupérer les photos dans l'ordre de sélection (ordre des photo_ids)
-        batch_ids = list(meal_plan.meal_plan_recipe_batches.values_list('recipe_batch_id', flat=True))
-        photos_dict = {p.id: p for p in PostPhoto.objects.filter(recipe_batch_id__in=batch_ids, id__in=photo_ids)}
-        if len(photos_dict) != len(photo_ids):
+        batch_ids = get_recipe_batch_ids(meal_plan)
+        photos_map = PostPhoto.objects.filter(recipe_batch_id__in=batch_ids).in_bulk(photo_ids)
+        if len(photos_map) != len(photo_ids):
             return Response({'error': 'Some photos are invalid or do not belong to this batch/meal plan'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Préserver l'ordre de sélection
-        photos = [photos_dict[pid] for pid in photo_ids]
+        photos = [photos_map[pid] for pid in photo_ids]
 
-        main_batch = meal_plan.meal_plan_recipe_batches.first()
+        main_batch = get_first_recipe_batch_link(meal_plan)
         post = Post.objects.create(
             user=request.user,
             recipe_batch=main_batch.recipe_batch if main_batch else None,
@@ -1657,11 +1810,11 @@ class MealPlanViewSet(viewsets.ModelViewSet):
             is_published=True
         )
 
-        # Associer les photos au post dans l'ordre de sélection et définir l'ordre
+        # Associer les photos au post dans l'ordre de sélection et définir l'ordre (un seul UPDATE)
         for order_index, photo in enumerate(photos, start=1):
             photo.post = post
             photo.order = order_index
-            photo.save(update_fields=['post', 'order'])
+        PostPhoto.objects.bulk_update(photos, ['post', 'order'])
 
         serializer = PostSerializer(post, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -1752,15 +1905,17 @@ class MealPlanViewSet(viewsets.ModelViewSet):
                     ).first()
                     
                     if existing_meal_plan:
-                        # Vérifier si le batch n'est pas déjà associé à ce meal plan
-                        if not existing_meal_plan.meal_plan_recipe_batches.filter(recipe_batch=batch).exists():
-                            # Ajouter le batch au meal plan existant
-                            MealPlanRecipeBatch.objects.create(
-                                meal_plan=existing_meal_plan,
-                                recipe_batch=batch,
-                                ratio=ratio,
-                                order=existing_meal_plan.meal_plan_recipe_batches.count()
-                            )
+                        # Ajouter le batch au meal plan existant s'il n'y est pas déjà :
+                        # unique_together (meal_plan, recipe_batch) tranche en cas de concurrence,
+                        # et l'ordre (callable) n'est compté que si le lien est créé
+                        MealPlanRecipeBatch.objects.get_or_create(
+                            meal_plan=existing_meal_plan,
+                            recipe_batch=batch,
+                            defaults={
+                                'ratio': ratio,
+                                'order': existing_meal_plan.meal_plan_recipe_batches.count,
+                            }
+                        )
                         meal_plan = existing_meal_plan
                     else:
                         # Créer un nouveau meal plan
@@ -1786,7 +1941,7 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         created_meal_plans = MealPlan.objects.filter(
             id__in=[mp.id for mp in created_meal_plans]
         ).prefetch_related(
-            Prefetch('meal_plan_recipe_batches', queryset=MealPlanRecipeBatch.objects.select_related('recipe_batch__recipe').order_by('order')),
+            meal_plan_recipe_batches_prefetch(),
             Prefetch('invitations', queryset=MealInvitation.objects.select_related('invitee')),
         )
         
@@ -1824,49 +1979,64 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         
         with transaction.atomic():
             # Récupérer les batches et ratios du meal plan source
-            source_recipes = source_meal_plan.meal_plan_recipe_batches.all().select_related('recipe_batch__recipe')
-            recipe_data = [(mpr.recipe_batch_id, mpr.recipe_batch.recipe_id, float(mpr.ratio), mpr.order) for mpr in source_recipes]
+            recipe_data = list(
+                source_meal_plan.meal_plan_recipe_batches.values_list('recipe_batch_id', 'ratio', 'order')
+            )
             
-            for date_key in date_keys:
-                try:
-                    target_date = datetime.strptime(date_key, '%Y-%m-%d').date()
-                except ValueError:
-                    continue
-                
-                # Vérifier si un meal plan existe déjà pour cette date + meal_time
-                existing_meal_plan = MealPlan.objects.filter(
+            target_dates = parse_date_keys(date_keys)
+            # Une seule requête pour les meal plans existants sur ces dates + meal_time
+            existing_by_date = {
+                mp.date: mp
+                for mp in MealPlan.objects.filter(
                     user=request.user,
-                    date=target_date,
-                    meal_time=meal_time
-                ).first()
-                
-                # Créer ou mettre à jour le meal plan
-                if existing_meal_plan:
-                    # Supprimer les anciennes recettes (elles seront recréées)
-                    existing_meal_plan.meal_plan_recipe_batches.all().delete()
-                    meal_plan = existing_meal_plan
-                else:
-                    # Créer un nouveau meal plan
-                    meal_plan = MealPlan.objects.create(
+                    meal_time=meal_time,
+                    date__in=target_dates,
+                )
+            }
+            
+            # Supprimer en une requête les anciennes recettes des meal plans existants (elles seront recréées)
+            if existing_by_date:
+                MealPlanRecipeBatch.objects.filter(meal_plan__in=list(existing_by_date.values())).delete()
+            
+            # Créer en un seul INSERT les meal plans manquants (Postgres renvoie les PK)
+            meal_plan_by_date = dict(existing_by_date)
+            meal_plan_by_date.update(
+                (mp.date, mp)
+                for mp in MealPlan.objects.bulk_create([
+                    MealPlan(
                         user=request.user,
                         date=target_date,
                         meal_time=meal_time,
                         meal_type=source_meal_plan.meal_type,
                         confirmed=source_meal_plan.confirmed,
                     )
+                    for target_date in target_dates
+                    if target_date not in existing_by_date
+                ])
+            )
+            
+            links_to_create = []
+            for target_date in target_dates:
+                meal_plan = meal_plan_by_date[target_date]
                 
-                # Ajouter les batches avec leurs ratios
-                for batch_id, recipe_id, ratio, order in recipe_data:
-                    # réutiliser le batch existant si dispo sinon clone
-                    batch = RecipeBatch.objects.get(id=batch_id) if batch_id else RecipeBatch.objects.create(recipe_id=recipe_id, created_by=request.user)
-                    MealPlanRecipeBatch.objects.create(
+                # Ajouter les batches du meal plan source avec leurs ratios (réutilisés, jamais clonés)
+                links_to_create.extend(
+                    MealPlanRecipeBatch(
                         meal_plan=meal_plan,
-                        recipe_batch=batch,
+                        recipe_batch_id=batch_id,
                         ratio=Decimal(str(ratio)),
                         order=order
                     )
+                    for batch_id, ratio, order in recipe_data
+                )
                 
                 created_meal_plans.append(meal_plan)
+            
+            MealPlanRecipeBatch.objects.bulk_create(links_to_create, batch_size=500)
+        
+        # bulk_create n'émet pas post_save (meal plans ni liens) : invalider explicitement le cache
+        invalidate_meal_plan_cache(request.user.id)
+        invalidate_batch_servings_cache([batch_id for batch_id, _ratio, _order in recipe_data])
         
         # Sérialiser les meal plans créés
         serializer = self.get_serializer(created_meal_plans, many=True)
@@ -1881,8 +2051,6 @@ class MealPlanViewSet(viewsets.ModelViewSet):
     def invite(self, request, pk=None):
         """Inviter des utilisateurs à un repas"""
         from django.contrib.auth import get_user_model
-        from django.db import transaction
-        from accounts.models import Follow, Notification
         User = get_user_model()
         
         meal_plan = self.get_object()
@@ -1891,57 +2059,83 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         if not invitee_ids:
             return Response({'error': 'invitee_ids is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Vérifier que les utilisateurs sont des complices
-        following_ids = Follow.objects.filter(follower=request.user).values_list('following_id', flat=True)
-        followers_ids = Follow.objects.filter(following=request.user).values_list('follower_id', flat=True)
-        complice_ids = set(list(following_ids) + list(followers_ids))
+        # Vérifier en SQL que les utilisateurs sont des complices (je les suis ou ils me suivent)
+        # et les charger dans la même requête, sans rapatrier tout le graphe social
+        requested_ids = [
+            user_id for user_id in invitee_ids
+            if isinstance(user_id, int) and not isinstance(user_id, bool)
+        ]
+        invitees = User.objects.filter(id__in=requested_ids).filter(
+            Exists(Follow.objects.filter(follower=request.user, following=OuterRef('pk')))
+            | Exists(Follow.objects.filter(following=request.user, follower=OuterRef('pk')))
+        ).in_bulk() if requested_ids else {}
         
-        valid_invitee_ids = [user_id for user_id in invitee_ids if user_id in complice_ids]
+        valid_invitee_ids = [user_id for user_id in requested_ids if user_id in invitees]
         
         if not valid_invitee_ids:
             return Response({'error': 'No valid complices found'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Précharger les utilisateurs pour éviter les requêtes N+1
-        invitees = {user.id: user for user in User.objects.filter(id__in=valid_invitee_ids)}
+        # Invités déjà présents sur ce repas (contrainte unique invitee + meal_plan)
+        pre_existing = set(
+            MealInvitation.objects.filter(
+                meal_plan=meal_plan, invitee_id__in=invitees.keys()
+            ).values_list('invitee_id', flat=True)
+        )
         
-        # Créer les invitations
+        # Créer les invitations manquantes en un seul INSERT ; ignore_conflicts couvre
+        # une invitation concurrente créée entre le snapshot et l'insertion
+        new_invitee_ids = [
+            invitee_id for invitee_id in dict.fromkeys(valid_invitee_ids)
+            if invitee_id in invitees and invitee_id not in pre_existing
+        ]
         invitations = []
-        notification_data = []  # Stocker les données de notification pour les créer après commit
-        
-        for invitee_id in valid_invitee_ids:
-            invitee = invitees.get(invitee_id)
-            if not invitee:
-                continue
-                
-            invitation, created = MealInvitation.objects.get_or_create(
-                inviter=request.user,
-                invitee=invitee,
-                meal_plan=meal_plan,
-                defaults={'status': 'pending'}
-            )
-            if created:
-                invitations.append(invitation)
-                # Stocker les données de notification pour les créer après commit (asynchrone)
-                notification_data.append({
-                    'user': invitee,
-                    'notification_type': 'meal_invitation',
-                    'title': f"{request.user.username} vous invite à un repas",
-                    'message': f"{request.user.username} vous invite à {meal_plan.get_meal_time_display()} le {meal_plan.date.strftime('%d/%m/%Y')}",
-                    'related_user': request.user
-                })
-        
-        # Créer les notifications après le commit de la transaction (asynchrone)
-        # Cela rend l'endpoint plus rapide car les notifications sont créées en arrière-plan
-        if notification_data:
-            def create_notifications():
-                for notif_data in notification_data:
-                    Notification.objects.create(**notif_data)
-            
-            transaction.on_commit(create_notifications)
+        if new_invitee_ids:
+            MealInvitation.objects.bulk_create(
+                [
+                    MealInvitation(
+                        inviter=request.user,
+                        invitee=invitees[invitee_id],
+                        meal_plan=meal_plan,
+                        status='pending',
+                    )
+                    for invitee_id in new_invitee_ids
+                ],
+                ignore_conflicts=True,
+            )
+            # ignore_conflicts ne renvoie pas les PK : relire les invitations créées
+            invitations = list(
+                MealInvitation.objects.filter(
+                    meal_plan=meal_plan, inviter=request.user, invitee_id__in=new_invitee_ids
+                ).select_related('inviter', 'invitee')
+            )
+            for invitation in invitations:
+                invitation.meal_plan = meal_plan
+            # bulk_create n'émet pas post_save : invalider explicitement les caches
+            invalidate_meal_plan_cache(meal_plan.user_id)
+            invalidate_meal_plan_batches_servings(meal_plan.id)
+        
+        # Titre et message sont identiques pour tous les invités : formatés une seule fois
+        username = request.user.username
+        notification_title = f"{username} vous invite à un repas"
+        notification_message = (
+            f"{username} vous invite à {meal_plan.get_meal_time_display()} le {meal_plan.date.strftime('%d/%m/%Y')}"
+        )
+        # Les notifications de la requête sont insérées ensemble après la réponse
+        # (NotificationBufferMiddleware)
+        for invitation in invitations:
+            queue_notification(
+                request,
+                user=invitation.invitee,
+                notification_type='meal_invitation',
+                title=notification_title,
+                message=notification_message,
+                related_user=request.user
+            )
         
-        # Rafraîchir le meal_plan depuis la DB pour avoir les invitations à jour
-        # (nécessaire car le serializer utilise obj.invitations.all() qui peut être mis en cache)
-        meal_plan.refresh_from_db()
+        # Oublier uniquement le prefetch des invitations : le serializer relira obj.invitations.all()
+        # à jour, sans re-SELECT du meal plan ni perte des autres relations préchargées
+        if new_invitee_ids and hasattr(meal_plan, '_prefetched_objects_cache'):
+            meal_plan._prefetched_objects_cache.pop('invitations', None)
         
         # Retourner le meal plan mis à jour avec les participants pour que le frontend ait les données à jour
         from .serializers import MealPlanSerializer
@@ -1984,8 +2178,6 @@ class MealInvitationViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def accept(self, request, pk=None):
         """Accepter une invitation à un repas"""
-        from accounts.models import Notification
-        
         invitation = self.get_object()
         
         if invitation.invitee != request.user:
@@ -2011,7 +2203,8 @@ class MealInvitationViewSet(viewsets.ModelViewSet):
         # Pas de shared_with: l'acceptation est portée par l'invitation (source of truth)
         
         # Créer une notification pour l'inviteur
-        Notification.objects.create(
+        queue_notification(
+            request,
             user=invitation.inviter,
             notification_type='meal_invitation',
             title=f"{request.user.username} a accepté votre invitation",
@@ -2157,6 +2350,7 @@ class CookingProgressViewSet(viewsets.ModelViewSet):
 class TimerViewSet(viewsets.ModelViewSet):
     """ViewSet pour les minuteurs actifs"""
     permission_classes = [IsAuthenticated]
+    STATE_ACTIONS = ('complete', 'update_remaining', 'add_time')
     
     def get_queryset(self):
         from django.utils import timezone
@@ -2169,6 +2363,9 @@ class TimerViewSet(viewsets.ModelViewSet):
             is_completed=False,
             expires_at__gte=one_hour_ago
         )
+        # Les mutations ne renvoient que l'état du minuteur : pas de jointures
+        if self.action in self.STATE_ACTIONS:
+            return queryset
         return queryset.select_related('recipe_batch', 'step', 'cooking_progress').order_by('expires_at')
     
     def get_serializer_class(self):
@@ -2176,6 +2373,16 @@ class TimerViewSet(viewsets.ModelViewSet):
             return TimerCreateSerializer
         return TimerSerializer
     
+    def _timer_state_response(self, timer):
+        """Réponse légère des mutations : état du minuteur, sans recette ni étape"""
+        return Response({
+            'id': timer.id,
+            'duration_minutes': timer.duration_minutes,
+            'remaining_seconds': timer.remaining_seconds,
+            'expires_at': timer.expires_at,
+            'is_completed': timer.is_completed,
+        })
+    
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
     
@@ -2192,8 +2399,7 @@ class TimerViewSet(viewsets.ModelViewSet):
         timer = self.get_object()
         timer.is_completed = True
         timer.save()
-        serializer = self.get_serializer(timer)
-        return Response(serializer.data)
+        return self._timer_state_response(timer)
     
     @action(detail=True, methods=['patch'])
     def update_remaining(self, request, pk=None):
@@ -2205,8 +2411,7 @@ class TimerViewSet(viewsets.ModelViewSet):
             timer.remaining_seconds = remaining_seconds
             timer.expires_at = timezone.now() + timezone.timedelta(seconds=remaining_seconds)
             timer.save()
-        serializer = self.get_serializer(timer)
-        return Response(serializer.data)
+        return self._timer_state_response(timer)
     
     @action(detail=True, methods=['patch'])
     def add_time(self, request, pk=None):
@@ -2231,17 +2436,21 @@ class TimerViewSet(viewsets.ModelViewSet):
             timer.expires_at = now + timezone.timedelta(seconds=new_remaining_seconds)
             timer.save()
         
-        serializer = self.get_serializer(timer)
-        return Response(serializer.data)
+        return self._timer_state_response(timer)
 
 
 class PostViewSet(viewsets.ModelViewSet):
     """ViewSet pour les posts"""
     permission_classes = [IsAuthenticated]
+    pagination_class = PostCursorPagination
+    # Actions détail qui ne lisent que les colonnes du post (pas de PostSerializer)
+    UNSERIALIZED_ACTIONS = ('destroy', 'delete_photo')
+    COOKIE_ACTIONS = ('send_cookie', 'remove_cookie')
+    # Mutations réservées à l'auteur : la propriété est vérifiée dans le WHERE (404 sinon)
+    OWNER_ACTIONS = ('update', 'partial_update', 'destroy', 'publish', 'delete_photo')
     
     def _user_can_manage_photo(self, photo, user):
-        owner = None
-        if photo.recipe_batch_id and photo.recipe_batch:
+        if photo.recipe_batch_id:
             # Vérifier que l'utilisateur a accès au batch via ses meal plans
             # (propriétaire ou invité accepté)
             accessible_meal_plan_filter = get_accessible_meal_plan_filter(user)
@@ -2252,35 +2461,72 @@ class PostViewSet(viewsets.ModelViewSet):
                 )
             ).exists()
             return has_access
-        elif photo.post_id and photo.post:
-            owner = photo.post.user
-        return owner == user
+        elif photo.post_id:
+            # Comparer les ids : pas de chargement de l'utilisateur propriétaire
+            return photo.post.user_id == user.id
         return False
     
-    def get_queryset(self):
-        # Si on demande les posts publiés, montrer tous les posts publiés de tous les utilisateurs
-        # Sinon, montrer uniquement les posts de l'utilisateur connecté
-        is_published = self.request.query_params.get('is_published')
-        friends_only = self.request.query_params.get('friends_only')
+    def _get_photo_target(self, request):
+        """
+        Cible d'un upload de photo (flux URL pré-signée) : un batch accessible via les meal plans
+        de l'utilisateur (recipe_batch_id) ou un de ses posts (post_id).
+        Retourne (champs du PostPhoto, None) ou (None, réponse d'erreur).
+        """
+        recipe_batch_id = request.data.get('recipe_batch_id')
+        post_id = request.data.get('post_id')
         
-        if is_published is not None and is_published.lower() == 'true':
-            queryset = Post.objects.filter(is_published=True)
-
-            # Filtrer uniquement les posts des amis
-            if friends_only and friends_only.lower() == 'true':
-                user = self.request.user
-                friend_ids = set()
-                # Utilisateurs que je suis
-                friend_ids.update(
-                    Follow.objects.filter(follower=user).values_list('following_id', flat=True)
-                )
-                # Utilisateurs qui me suivent
-                friend_ids.update(
-                    Follow.objects.filter(following=user).values_list('follower_id', flat=True)
-                )
-                queryset = queryset.filter(user_id__in=list(friend_ids))
-        else:
-            queryset = Post.objects.filter(user=self.request.user)
+        if post_id and not recipe_batch_id:
+            post = Post.objects.filter(id=post_id, user=request.user).only('id').first()
+            if not post:
+                return None, Response({'error': 'Post not found or access denied'}, status=status.HTTP_404_NOT_FOUND)
+            return {'post': post}, None
+        
+        if not recipe_batch_id:
+            return None, Response({'error': 'recipe_batch_id or post_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            # Vérifier que le batch existe et que l'utilisateur y a accès via ses meal plans
+            # (propriétaire ou invité accepté)
+            accessible_meal_plan_filter = get_accessible_meal_plan_filter(request.user)
+            recipe_batch = RecipeBatch.objects.filter(
+                id=recipe_batch_id,
+                meal_plan_recipe_batches__meal_plan__in=MealPlan.objects.filter(
+                    accessible_meal_plan_filter
+                )
+            ).distinct().first()
+            if not recipe_batch:
+                return None, Response({'error': 'Recipe batch not found or access denied'}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            return None, Response({'error': f'Error accessing recipe batch: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return {'recipe_batch': recipe_batch}, None
+    
+    @staticmethod
+    def _photo_target_prefix(target):
+        if 'post' in target:
+            return f"posts/{target['post'].id}"
+        return f"recipe_batches/{target['recipe_batch'].id}"
+    
+    @staticmethod
+    def _photo_target_label(target):
+        return 'post' if 'post' in target else 'recipe batch'
+    
+    def get_queryset(self):
+        # Si on demande les posts publiés, montrer tous les posts publiés de tous les utilisateurs
+        # Sinon, montrer uniquement les posts de l'utilisateur connecté
+        is_published = self.request.query_params.get('is_published')
+        friends_only = self.request.query_params.get('friends_only')
+        
+        if self.action in self.OWNER_ACTIONS:
+            queryset = Post.objects.filter(user=self.request.user)
+        elif is_published is not None and is_published.lower() == 'true':
+            queryset = Post.objects.filter(is_published=True)
+
+            # Filtrer uniquement les posts des amis
+            if friends_only and friends_only.lower() == 'true':
+                # Suivis + followers, en cache (invalidé par les signaux de Follow)
+                queryset = queryset.filter(user_id__in=get_friend_ids(self.request.user))
+        else:
+            queryset = Post.objects.filter(user=self.request.user)
         
         # Filtrer par batch (nouveau modèle) ou par recette via le batch
         recipe_batch_id = self.request.query_params.get('recipe_batch')
@@ -2299,36 +2545,60 @@ class PostViewSet(viewsets.ModelViewSet):
             except (ValueError, TypeError):
                 pass
         
+        # Actions qui ne sérialisent pas le post : ni jointures, ni prefetch, ni annotations
+        if self.action in self.UNSERIALIZED_ACTIONS:
+            return queryset
+        
+        # Cookies : nombre et "cookie de l'utilisateur courant" calculés en SQL, sans charger les PostCookie
+        queryset = queryset.annotate(
+            cookies_count=Count('cookies'),
+            has_cookied=Exists(PostCookie.objects.filter(post=OuterRef('pk'), user=self.request.user)),
+        )
+        
+        # send_cookie / remove_cookie ne renvoient que l'état des cookies (MinimalPostSerializer)
+        if self.action in self.COOKIE_ACTIONS:
+            return queryset
+        
         # Optimisation : pour les listes, limiter les champs chargés
         if self.action == 'list':
-            from django.db.models import Prefetch
             queryset = queryset.select_related(
                 'user',
                 'recipe_batch',
                 'recipe_batch__recipe'
             ).prefetch_related(
-                'photos', 'cookies',
+                'photos',
                 Prefetch(
                     'recipe_batch__meal_plan_recipe_batches',
                     queryset=MealPlanRecipeBatch.objects.select_related('meal_plan').only('meal_plan_id', 'meal_plan__date', 'meal_plan__meal_time')
                 )
-            ).order_by('-created_at')
+            )
+            # Le tri (-created_at, -id) est appliqué par PostCursorPagination
         else:
             queryset = queryset.select_related(
                 'user',
                 'recipe_batch',
                 'recipe_batch__recipe'
-            ).prefetch_related('photos', 'cookies').order_by('-created_at')
+            ).prefetch_related('photos')
         
         return queryset
     
     def list(self, request, *args, **kwargs):
         """Liste optimisée des posts avec pagination"""
-        logger = logging.getLogger(__name__)
+        is_published = request.query_params.get('is_published') or ''
+        # Première page du fil publié : payload identique d'un rafraîchissement à l'autre
+        if is_published.lower() == 'true' and 'cursor' not in request.query_params:
+            key = get_feed_cache_key(request.user.id, request.query_params)
+            data = cache.get(key)
+            if data is None:
+                data = self._list_data()
+                cache.set(key, data, FEED_CACHE_TTL)
+            return Response(data)
+        return Response(self._list_data())
+    
+    def _list_data(self):
         t0 = perf_counter()
         queryset = self.filter_queryset(self.get_queryset())
         t_qs = perf_counter()
-        print(f"[PostViewSet.list] start count={queryset.count()}")
         
         # Utiliser la pagination DRF
         page = self.paginate_queryset(queryset)
@@ -2336,7 +2606,6 @@ class PostViewSet(viewsets.ModelViewSet):
         if page is not None:
             serializer = self.get_serializer(page, many=True)
             t_ser = perf_counter()
-            print(f"[PostViewSet.list] page count={len(page)} qs_ms={(t_qs - t0)*1000:.1f} paginate_ms={(t_paginate - t_qs)*1000:.1f} serialize_ms={(t_ser - t_paginate)*1000:.1f} total_ms={(t_ser - t0)*1000:.1f}")
             logger.info(
                 "[PostViewSet.list] page count=%s qs_time_ms=%.1f paginate_ms=%.1f serialize_ms=%.1f total_ms=%.1f",
                 len(page),
@@ -2345,21 +2614,20 @@ class PostViewSet(viewsets.ModelViewSet):
                 (t_ser - t_paginate) * 1000,
                 (t_ser - t0) * 1000,
             )
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(serializer.data).data
         
         # Fallback si pas de pagination (ne devrait pas arriver)
         serializer = self.get_serializer(queryset, many=True)
         t_ser = perf_counter()
-        print(f"[PostViewSet.list] no_page count={queryset.count()} qs_ms={(t_qs - t0)*1000:.1f} paginate_ms={(t_paginate - t_qs)*1000:.1f} serialize_ms={(t_ser - t_paginate)*1000:.1f} total_ms={(t_ser - t0)*1000:.1f}")
         logger.info(
             "[PostViewSet.list] no_page count=%s qs_time_ms=%.1f paginate_ms=%.1f serialize_ms=%.1f total_ms=%.1f",
-            queryset.count(),
+            len(queryset),
             (t_qs - t0) * 1000,
             (t_paginate - t_qs) * 1000,
             (t_ser - t_paginate) * 1000,
             (t_ser - t0) * 1000,
         )
-        return Response(serializer.data)
+        return serializer.data
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -2375,26 +2643,11 @@ class PostViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def get_upload_presigned_url(self, request):
         """Générer une URL pré-signée pour uploader une photo directement vers S3"""
-        recipe_batch_id = request.data.get('recipe_batch_id')
         photo_type = request.data.get('photo_type', 'spontaneous')
         
-        if not recipe_batch_id:
-            return Response({'error': 'recipe_batch_id is required'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        try:
-            # Vérifier que le batch existe et que l'utilisateur y a accès via ses meal plans
-            # (propriétaire ou invité accepté)
-            accessible_meal_plan_filter = get_accessible_meal_plan_filter(request.user)
-            recipe_batch = RecipeBatch.objects.filter(
-                id=recipe_batch_id,
-                meal_plan_recipe_batches__meal_plan__in=MealPlan.objects.filter(
-                    accessible_meal_plan_filter
-                )
-            ).distinct().first()
-            if not recipe_batch:
-                return Response({'error': 'Recipe batch not found or access denied'}, status=status.HTTP_404_NOT_FOUND)
-        except Exception as e:
-            return Response({'error': f'Error accessing recipe batch: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        target, error_response = self._get_photo_target(request)
+        if error_response:
+            return error_response
         
         # Vérifier que le type de photo est valide
         if photo_type not in PHOTO_TYPES:
@@ -2402,47 +2655,22 @@ class PostViewSet(viewsets.ModelViewSet):
         
         # Vérifier l'unicité pour les types non-spontanés
         if photo_type in RESTRICTED_PHOTO_TYPES:
-            existing_photo = PostPhoto.objects.filter(recipe_batch=recipe_batch, photo_type=photo_type).first()
-            if existing_photo:
-                return Response({'error': f'A {photo_type} photo already exists for this recipe batch'}, status=status.HTTP_400_BAD_REQUEST)
+            if PostPhoto.objects.filter(photo_type=photo_type, **target).exists():
+                return Response({'error': f'A {photo_type} photo already exists for this {self._photo_target_label(target)}'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            # Vérifier que les credentials S3 sont configurés
-            aws_access_key = settings.AWS_ACCESS_KEY_ID
-            aws_secret_key = settings.AWS_SECRET_ACCESS_KEY
-            bucket_name = settings.AWS_BUCKET
-            region = settings.AWS_S3_REGION_NAME
-            
-            print(f"🔍 S3 Config check:")
-            print(f"  - AWS_ACCESS_KEY_ID: {'✅ Set' if aws_access_key else '❌ Missing'}")
-            print(f"  - AWS_SECRET_ACCESS_KEY: {'✅ Set' if aws_secret_key else '❌ Missing'}")
-            print(f"  - AWS_BUCKET: {bucket_name if bucket_name else '❌ Missing'}")
-            print(f"  - AWS_S3_REGION_NAME: {region}")
-            
-            if not aws_access_key or not aws_secret_key or not bucket_name:
-                return Response({
-                    'error': 'S3 configuration is missing. Please configure AWS credentials in .env file.',
-                    'details': {
-                        'has_access_key': bool(aws_access_key),
-                        'has_secret_key': bool(aws_secret_key),
-                        'has_bucket_name': bool(bucket_name),
-                    }
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-            # Nettoyer le nom du bucket
-            bucket_name = bucket_name.strip()
-            if not bucket_name:
-                return Response({
-                    'error': 'AWS_BUCKET is empty'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            # Configuration vérifiée une fois au chargement du module
+            if not S3_CONFIGURED:
+                return Response({'error': 'S3 configuration is missing'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            bucket_name = S3_BUCKET
             
             s3_client = build_s3_client()
             
             # Générer un nom de fichier unique (sans caractères spéciaux)
-            unique_id = str(uuid.uuid4()).replace('-', '')
-            file_name = f"recipe_batches/{recipe_batch.id}/{unique_id}.jpg"
+            unique_id = secrets.token_hex(16)
+            file_name = f"{self._photo_target_prefix(target)}/{unique_id}.jpg"
             
-            print(f"🔑 Generating presigned URL for bucket: {bucket_name}, key: {file_name}")
+            logger.debug("Generating presigned URL for bucket=%s key=%s", bucket_name, file_name)
             
             # Générer l'URL pré-signée pour l'upload (valide 5 minutes)
             # Note: ACL est déprécié dans certaines régions, on l'enlève
@@ -2456,9 +2684,8 @@ class PostViewSet(viewsets.ModelViewSet):
                     },
                     ExpiresIn=300  # 5 minutes
                 )
-                print(f"✅ Presigned URL generated successfully")
             except Exception as url_error:
-                print(f"❌ Error generating presigned URL: {url_error}")
+                logger.debug("Presigned URL with ContentType failed, retrying without: %s", url_error)
                 # Essayer sans ContentType si ça échoue
                 presigned_url = s3_client.generate_presigned_url(
                     'put_object',
@@ -2468,22 +2695,21 @@ class PostViewSet(viewsets.ModelViewSet):
                     },
                     ExpiresIn=300
                 )
-                print(f"✅ Presigned URL generated (without ContentType)")
             
             # Retourner le chemin relatif (image_path) au lieu de l'URL complète
             return Response({
                 'presigned_url': presigned_url,
                 'file_name': file_name,
                 'image_path': file_name,  # Chemin relatif à stocker en base
-                'recipe_batch_id': recipe_batch_id,
+                'recipe_batch_id': request.data.get('recipe_batch_id'),
+                'post_id': request.data.get('post_id'),
                 'photo_type': photo_type
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
             import traceback
             error_details = traceback.format_exc()
-            print(f"❌ Error generating presigned URL: {str(e)}")
-            print(f"Traceback: {error_details}")
+            logger.exception("Error generating presigned URL: %s", e)
             return Response({
                 'error': f'Error generating presigned URL: {str(e)}',
                 'details': error_details if settings.DEBUG else None
@@ -2492,48 +2718,35 @@ class PostViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def confirm_photo_upload(self, request):
         """Confirmer qu'une photo a été uploadée et créer l'objet PostPhoto"""
-        recipe_batch_id = request.data.get('recipe_batch_id')
         image_path = request.data.get('image_path') or request.data.get('file_name')  # Support des deux pour compatibilité
         photo_type = request.data.get('photo_type', 'spontaneous')
         step_id = request.data.get('step_id', None)
         
-        if not recipe_batch_id or not image_path:
-            return Response({'error': 'recipe_batch_id and image_path (or file_name) are required'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        try:
-            # Vérifier que le batch existe et que l'utilisateur y a accès via ses meal plans
-            # (propriétaire ou invité accepté)
-            accessible_meal_plan_filter = get_accessible_meal_plan_filter(request.user)
-            recipe_batch = RecipeBatch.objects.filter(
-                id=recipe_batch_id,
-                meal_plan_recipe_batches__meal_plan__in=MealPlan.objects.filter(
-                    accessible_meal_plan_filter
-                )
-            ).distinct().first()
-            if not recipe_batch:
-                return Response({'error': 'Recipe batch not found or access denied'}, status=status.HTTP_404_NOT_FOUND)
-        except Exception as e:
-            return Response({'error': f'Error accessing recipe batch: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if not image_path:
+            return Response({'error': 'image_path (or file_name) is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Vérifier l'unicité pour certains types
-        if photo_type in RESTRICTED_PHOTO_TYPES:
-            existing_photo = PostPhoto.objects.filter(recipe_batch=recipe_batch, photo_type=photo_type).first()
-            if existing_photo:
-                return Response({'error': f'A {photo_type} photo already exists for this recipe batch'}, status=status.HTTP_400_BAD_REQUEST)
+        target, error_response = self._get_photo_target(request)
+        if error_response:
+            return error_response
         
-        # Créer l'objet PostPhoto avec image_path
+        # Créer l'objet PostPhoto avec image_path, rattaché au batch ou au post
         photo_data = {
-            'recipe_batch': recipe_batch,
+            **target,
             'photo_type': photo_type,
             'image_path': image_path
         }
         if step_id:
-            try:
-                photo_data['step'] = Step.objects.get(id=step_id)
-            except Step.DoesNotExist:
-                pass
+            # L'étape serait relue de toute façon pour step_order / step_title de la réponse :
+            # une seule requête, limitée aux colonnes sérialisées (étape inconnue ignorée)
+            photo_data['step'] = Step.objects.only('id', 'order', 'title').filter(id=step_id).first()
         
-        post_photo = PostPhoto.objects.create(**photo_data)
+        # L'unicité des types restreints est garantie par les contraintes
+        # unique_photo_type_per_batch / unique_photo_type_per_post
+        try:
+            with transaction.atomic():
+                post_photo = PostPhoto.objects.create(**photo_data)
+        except IntegrityError:
+            return Response({'error': f'A {photo_type} photo already exists for this {self._photo_target_label(target)}'}, status=status.HTTP_400_BAD_REQUEST)
         
         serializer = PostPhotoSerializer(post_photo, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -2553,7 +2766,7 @@ class PostViewSet(viewsets.ModelViewSet):
         content_type = 'image/jpeg' if extension in ['jpg', 'jpeg'] else f'image/{extension}'
         
         try:
-            photo = PostPhoto.objects.select_related('recipe_batch', 'post').get(id=photo_id)
+            photo = PostPhoto.objects.select_related('post').only(*PHOTO_PERMISSION_FIELDS).get(id=photo_id)
         except PostPhoto.DoesNotExist:
             return Response({'error': 'Photo not found'}, status=status.HTTP_404_NOT_FOUND)
         
@@ -2566,14 +2779,14 @@ class PostViewSet(viewsets.ModelViewSet):
         elif photo.post_id:
             base_path = f"posts/{photo.post_id}"
         
-        file_name = f"{base_path}/edits/{uuid.uuid4().hex}.{extension}"
+        file_name = f"{base_path}/edits/{secrets.token_hex(16)}.{extension}"
         
         try:
             s3_client = build_s3_client()
             presigned_url = s3_client.generate_presigned_url(
                 'put_object',
                 Params={
-                    'Bucket': settings.AWS_BUCKET,
+                    'Bucket': S3_BUCKET,
                     'Key': file_name,
                     'ContentType': content_type,
                 },
@@ -2601,7 +2814,9 @@ class PostViewSet(viewsets.ModelViewSet):
             return Response({'error': 'photo_id and file_name are required'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            original_photo = PostPhoto.objects.select_related('meal_plan', 'post').get(id=photo_id)
+            original_photo = PostPhoto.objects.select_related('post').only(
+                *PHOTO_PERMISSION_FIELDS, 'photo_type', 'step', 'created_at'
+            ).get(id=photo_id)
         except PostPhoto.DoesNotExist:
             return Response({'error': 'Photo not found'}, status=status.HTTP_404_NOT_FOUND)
         
@@ -2616,10 +2831,10 @@ class PostViewSet(viewsets.ModelViewSet):
         # et on conserve la date de création
         new_photo = PostPhoto(
             post=None,  # La nouvelle photo n'est pas associée à un post
-            recipe_batch=original_photo.recipe_batch,
+            recipe_batch_id=original_photo.recipe_batch_id,
             photo_type=original_photo.photo_type,
             image_path=new_path,
-            step=original_photo.step,
+            step_id=original_photo.step_id,
             created_at=original_photo.created_at,  # Conserver la même date de création
         )
         new_photo.save()
@@ -2629,104 +2844,14 @@ class PostViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'])
     def upload_photo_to_meal_plan(self, request):
-        """Uploader une photo associée à un meal_plan (avant publication)"""
-        
-        meal_plan_id = request.data.get('meal_plan_id')
-        if not meal_plan_id:
-            return Response({'error': 'meal_plan_id is required'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        try:
-            meal_plan = MealPlan.objects.get(id=meal_plan_id, user=request.user)
-        except MealPlan.DoesNotExist:
-            return Response({'error': 'Meal plan not found'}, status=status.HTTP_404_NOT_FOUND)
-        
-        # Vérifier que la photo est fournie
-        if 'photo' not in request.FILES:
-            return Response({'error': 'Photo is required'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        photo_file = request.FILES['photo']
-        photo_type = request.data.get('photo_type', 'spontaneous')
-        step_id = request.data.get('step_id', None)
-        
-        # Vérifier que le type de photo est valide
-        if photo_type not in PHOTO_TYPES:
-            return Response({'error': f'Invalid photo_type. Must be one of: {", ".join(PHOTO_TYPES)}'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Vérifier l'unicité pour certains types
-        if photo_type in RESTRICTED_PHOTO_TYPES:
-            existing_photo = PostPhoto.objects.filter(meal_plan=meal_plan, photo_type=photo_type).first()
-            if existing_photo:
-                return Response({'error': f'A {photo_type} photo already exists for this meal plan'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Upload vers S3
-        try:
-            s3_client = build_s3_client()
-            
-            # Générer un nom de fichier unique
-            # Nettoyer le nom du fichier pour éviter les caractères invalides
-            original_filename = photo_file.name if hasattr(photo_file, 'name') and photo_file.name else 'photo.jpg'
-            file_extension = original_filename.split('.')[-1].lower() if '.' in original_filename else 'jpg'
-            # S'assurer que l'extension est valide
-            if file_extension not in ['jpg', 'jpeg', 'png', 'gif', 'webp']:
-                file_extension = 'jpg'
-            
-            # Créer un nom de fichier propre avec UUID (sans caractères spéciaux)
-            unique_id = str(uuid.uuid4()).replace('-', '')
-            file_name = f"meal_plans/{meal_plan.id}/{unique_id}.{file_extension}"
-            
-            # Déterminer le content type
-            content_type = getattr(photo_file, 'content_type', None) or f'image/{file_extension}'
-            if content_type == 'image/jpg':
-                content_type = 'image/jpeg'
-            elif not content_type.startswith('image/'):
-                content_type = f'image/{file_extension}'
-            
-            # S'assurer que le fichier est en mode lecture
-            if hasattr(photo_file, 'seek'):
-                photo_file.seek(0)
-            
-            # Upload vers S3
-            s3_client.upload_fileobj(
-                photo_file,
-                settings.AWS_BUCKET,
-                file_name,
-                ExtraArgs={
-                    'ACL': 'public-read',
-                    'ContentType': content_type
-                }
-            )
-            
-            # Créer l'objet PostPhoto avec image_path (chemin relatif)
-            photo_data = {
-                'meal_plan': meal_plan,
-                'photo_type': photo_type,
-                'image_path': file_name  # Stocker le chemin relatif
-            }
-            if step_id:
-                try:
-                    photo_data['step'] = Step.objects.get(id=step_id)
-                except Step.DoesNotExist:
-                    pass
-            
-            post_photo = PostPhoto.objects.create(**photo_data)
-            
-            serializer = PostPhotoSerializer(post_photo, context={'request': request})
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-            
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            print(f"❌ Error uploading photo to S3 (meal_plan): {str(e)}")
-            print(f"Traceback: {error_details}")
-            print(f"Photo file type: {type(photo_file)}")
-            if hasattr(photo_file, 'name'):
-                print(f"Photo file name: {photo_file.name}")
-            if hasattr(photo_file, 'content_type'):
-                print(f"Photo file content_type: {photo_file.content_type}")
-            return Response({
-                'error': f'Error uploading photo: {str(e)}',
-                'details': error_details if settings.DEBUG else None
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        """
+        Obsolète : l'upload transitant par Django est remplacé par le flux
+        get_upload_presigned_url + confirm_photo_upload (PUT direct vers S3).
+        """
+        return Response(
+            {'error': 'Server-side upload is no longer supported. Use get_upload_presigned_url then confirm_photo_upload.'},
+            status=status.HTTP_410_GONE
+        )
     
     @action(detail=False, methods=['post'])
     def publish_from_meal_plan(self, request):
@@ -2743,7 +2868,13 @@ class PostViewSet(viewsets.ModelViewSet):
         except MealPlan.DoesNotExist:
             return Response({'error': 'Meal plan not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        photos_qs = PostPhoto.objects.filter(meal_plan=meal_plan)
+        # PostPhoto n'a pas de FK vers MealPlan : les photos du repas sont celles de ses batches.
+        # Seules les photos encore libres sont publiables : une publication concurrente qui
+        # attend le verrou ne voit plus celles rattachées par la première (400 ci-dessous)
+        photos_qs = PostPhoto.objects.filter(
+            recipe_batch_id__in=meal_plan.meal_plan_recipe_batches.values('recipe_batch_id'),
+            post__isnull=True,
+        )
         if isinstance(photo_ids, list) and photo_ids:
             try:
                 photo_ids = [int(pid) for pid in photo_ids]
@@ -2751,103 +2882,64 @@ class PostViewSet(viewsets.ModelViewSet):
                 return Response({'error': 'photo_ids must contain integers'}, status=status.HTTP_400_BAD_REQUEST)
             photos_qs = photos_qs.filter(id__in=photo_ids)
         
-        photos = list(photos_qs.order_by('created_at'))
-        
-        if not photos:
-            return Response({'error': 'No photos selected for this meal plan'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        if len(photos) > 10:
-            return Response({'error': 'You can select up to 10 photos per post'}, status=status.HTTP_400_BAD_REQUEST)
-        
         # Récupérer le batch principal
         main_batch = meal_plan.meal_plan_recipe_batches.select_related('recipe_batch').first()
         if not main_batch or not main_batch.recipe_batch:
             return Response({'error': 'No recipe batch found for this meal plan'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Créer le post
-        post = Post.objects.create(
-            user=request.user,
-            recipe_batch=main_batch.recipe_batch,
-            comment=comment,
-            is_published=True
-        )
-        
-        # Associer toutes les photos au post (tout en conservant l'association au meal_plan)
-        PostPhoto.objects.filter(id__in=[p.id for p in photos]).update(post=post)
+        # Une seule transaction : pas de post sans photos en cas d'échec, et les photos
+        # verrouillées ne peuvent pas être rattachées par une publication concurrente
+        with transaction.atomic():
+            # Les photos viennent de tous les batches du repas : un post n'accepte qu'une photo
+            # par type restreint (unique_photo_type_per_post), la plus ancienne est conservée.
+            # Seuls les ids sont nécessaires ; 11 suffisent pour détecter le dépassement de la limite
+            selected_photo_ids = []
+            seen_restricted_types = set()
+            for photo_id, photo_type in photos_qs.select_for_update().order_by('created_at').values_list('id', 'photo_type'):
+                if photo_type in RESTRICTED_PHOTO_TYPES:
+                    if photo_type in seen_restricted_types:
+                        continue
+                    seen_restricted_types.add(photo_type)
+                selected_photo_ids.append(photo_id)
+                if len(selected_photo_ids) > 10:
+                    break
+            
+            if not selected_photo_ids:
+                return Response({'error': 'No photos selected for this meal plan'}, status=status.HTTP_400_BAD_REQUEST)
+            
+            if len(selected_photo_ids) > 10:
+                return Response({'error': 'You can select up to 10 photos per post'}, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Créer le post
+            post = Post.objects.create(
+                user=request.user,
+                recipe_batch=main_batch.recipe_batch,
+                comment=comment,
+                is_published=True
+            )
+            
+            # Associer toutes les photos au post (tout en conservant l'association au batch)
+            PostPhoto.objects.filter(id__in=selected_photo_ids).update(post=post)
         
         serializer = PostSerializer(post, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     @action(detail=True, methods=['post'])
     def upload_photo(self, request, pk=None):
-        """Uploader une photo pour un post"""
-        post = self.get_object()
-        
-        if post.user != request.user:
-            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-        
-        # Vérifier que la photo est fournie
-        if 'photo' not in request.FILES:
-            return Response({'error': 'Photo is required'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        photo_file = request.FILES['photo']
-        photo_type = request.data.get('photo_type', 'spontaneous')
-        step_id = request.data.get('step_id', None)
-        
-        # Vérifier que le type de photo est valide
-        if photo_type not in PHOTO_TYPES:
-            return Response({'error': f'Invalid photo_type. Must be one of: {", ".join(PHOTO_TYPES)}'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Vérifier l'unicité pour les types non-spontanés
-        if photo_type in RESTRICTED_PHOTO_TYPES:
-            existing_photo = PostPhoto.objects.filter(post=post, photo_type=photo_type).first()
-            if existing_photo:
-                return Response({'error': f'A {photo_type} photo already exists for this post'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Upload vers S3
-        try:
-            s3_client = build_s3_client()
-            
-            # Générer un nom de fichier unique
-            file_extension = photo_file.name.split('.')[-1] if '.' in photo_file.name else 'jpg'
-            file_name = f"posts/{post.id}/{uuid.uuid4()}.{file_extension}"
-            
-            # Upload vers S3
-            s3_client.upload_fileobj(
-                photo_file,
-                settings.AWS_BUCKET,
-                file_name,
-                ExtraArgs={'ACL': 'public-read', 'ContentType': photo_file.content_type}
-            )
-            
-            # Créer l'objet PostPhoto avec image_path (chemin relatif)
-            photo_data = {
-                'post': post,
-                'photo_type': photo_type,
-                'image_path': file_name  # Stocker le chemin relatif
-            }
-            if step_id:
-                try:
-                    photo_data['step'] = Step.objects.get(id=step_id)
-                except Step.DoesNotExist:
-                    pass
-            
-            post_photo = PostPhoto.objects.create(**photo_data)
-            
-            serializer = PostPhotoSerializer(post_photo, context={'request': request})
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-            
-        except Exception as e:
-            return Response({'error': f'Error uploading photo: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        """
+        Obsolète : l'upload transitant par Django est remplacé par le flux
+        get_upload_presigned_url + confirm_photo_upload avec post_id (PUT direct vers S3).
+        """
+        return Response(
+            {'error': 'Server-side upload is no longer supported. Use get_upload_presigned_url then confirm_photo_upload with post_id.'},
+            status=status.HTTP_410_GONE
+        )
     
     @action(detail=True, methods=['post'])
     def publish(self, request, pk=None):
         """Publier un post (nécessite les 3 photos)"""
         post = self.get_object()
         
-        if post.user != request.user:
-            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-        
         if post.photos.count() == 0:
             return Response(
                 {'error': 'At least one photo is required before publishing'},
@@ -2865,9 +2957,6 @@ class PostViewSet(viewsets.ModelViewSet):
         """Supprimer une photo d'un post"""
         post = self.get_object()
         
-        if post.user != request.user:
-            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-        
         photo_id = request.data.get('photo_id')
         if not photo_id:
             return Response({'error': 'photo_id is required'}, status=status.HTTP_400_BAD_REQUEST)
@@ -2875,19 +2964,15 @@ class PostViewSet(viewsets.ModelViewSet):
         try:
             photo = PostPhoto.objects.get(id=photo_id, post=post)
             
-            # Supprimer de S3
-            try:
-                s3_client = build_s3_client()
-                # Utiliser directement image_path (nettoyer le préfixe s3:/ si présent)
-                file_path = photo.image_path.replace('s3:/', '').lstrip('/') if photo.image_path else None
-                if file_path:
-                    s3_client.delete_object(Bucket=settings.AWS_BUCKET, Key=file_path)
-            except Exception as e:
-                print(f"Error deleting from S3: {str(e)}")
-            
             # Supprimer de la base de données
             photo.delete()
             
+            # Supprimer de S3 en tâche de fond, une fois la suppression validée
+            # Utiliser directement image_path (nettoyer le préfixe s3:/ si présent)
+            file_path = photo.image_path.replace('s3:/', '').lstrip('/') if photo.image_path else None
+            if file_path and S3_BUCKET:
+                transaction.on_commit(lambda: queue_s3_object_deletion(S3_BUCKET, file_path))
+            
             return Response({'message': 'Photo deleted successfully'}, status=status.HTTP_200_OK)
             
         except PostPhoto.DoesNotExist:
@@ -2899,21 +2984,27 @@ class PostViewSet(viewsets.ModelViewSet):
         post = self.get_object()
         user = request.user
         
-        # Vérifier si l'utilisateur a déjà donné un cookie
-        cookie, created = PostCookie.objects.get_or_create(
-            user=user,
-            post=post
-        )
+        # INSERT direct : unique_together (user, post) signale un cookie déjà donné,
+        # sans SELECT préalable comme get_or_create
+        try:
+            with transaction.atomic():
+                PostCookie.objects.create(user=user, post=post)
+            created = True
+        except IntegrityError:
+            created = False
         
         if created:
-            serializer = PostSerializer(post, context={'request': request})
+            # Garder les annotations cohérentes avec le cookie ajouté
+            post.cookies_count += 1
+            post.has_cookied = True
+            serializer = MinimalPostSerializer(post)
             return Response({
                 'message': 'Cookie sent successfully',
                 'post': serializer.data
             }, status=status.HTTP_201_CREATED)
         else:
             # Cookie déjà existant
-            serializer = PostSerializer(post, context={'request': request})
+            serializer = MinimalPostSerializer(post)
             return Response({
                 'message': 'Cookie already sent',
                 'post': serializer.data
@@ -2925,16 +3016,18 @@ class PostViewSet(viewsets.ModelViewSet):
         post = self.get_object()
         user = request.user
         
-        try:
-            cookie = PostCookie.objects.get(user=user, post=post)
-            cookie.delete()
-            serializer = PostSerializer(post, context={'request': request})
-            return Response({
-                'message': 'Cookie removed successfully',
-                'post': serializer.data
-            }, status=status.HTTP_200_OK)
-        except PostCookie.DoesNotExist:
+        # Un seul DELETE : le nombre de lignes supprimées indique si le cookie existait
+        deleted, _ = PostCookie.objects.filter(user=user, post=post).delete()
+        if not deleted:
             return Response({'error': 'Cookie not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        post.cookies_count -= 1
+        post.has_cookied = False
+        serializer = MinimalPostSerializer(post)
+        return Response({
+            'message': 'Cookie removed successfully',
+            'post': serializer.data
+        }, status=status.HTTP_200_OK)
 
 
 class ShoppingListViewSet(viewsets.ModelViewSet):
@@ -2944,8 +3037,6 @@ class ShoppingListViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filtrer par utilisateur"""
-        from django.db.models import Prefetch
-        
         queryset = ShoppingList.objects.filter(user=self.request.user)
         
         # Filtrer par liste active
@@ -2959,12 +3050,7 @@ class ShoppingListViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(is_archived=False)
         
         # Optimisation : précharger toutes les relations nécessaires
-        return queryset.prefetch_related(
-            Prefetch('recipe_batches', queryset=RecipeBatch.objects.select_related('recipe').prefetch_related(
-                Prefetch('recipe__recipe_ingredients', queryset=RecipeIngredient.objects.select_related('ingredient__category'))
-            )),
-            Prefetch('items', queryset=ShoppingListItem.objects.select_related('ingredient__category'))
-        ).order_by('-created_at')
+        return queryset.prefetch_related(*shopping_list_full_prefetch()).order_by('-created_at')
     
     @action(detail=True, methods=['post'])
     def archive(self, request, pk=None):
@@ -2978,69 +3064,51 @@ class ShoppingListViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def generate_items(self, request, pk=None):
         """Générer automatiquement les items d'ingrédients à partir des recipe_batches"""
-        from django.db.models import Prefetch
+        shopping_list = get_object_or_404(ShoppingList.objects.only('id'), id=pk, user=request.user)
         
-        shopping_list = ShoppingList.objects.prefetch_related(
-            Prefetch('recipe_batches', queryset=RecipeBatch.objects.select_related(
-                'recipe'
-            ).prefetch_related(
-                Prefetch('recipe__recipe_ingredients', queryset=RecipeIngredient.objects.select_related('ingredient__category'))
-            ))
-        ).get(id=pk, user=request.user)
-        
-        ingredients_map = {}
-        
-        for batch in shopping_list.recipe_batches.all():
-            recipe = batch.recipe
-            if not recipe:
-                continue
-            servings = batch.total_servings_batch if hasattr(batch, 'total_servings_batch') else recipe.servings or 1
-            base_servings = recipe.servings or 1
-            ratio = servings / base_servings if base_servings else 1
-            
-            for recipe_ingredient in recipe.recipe_ingredients.all():
-                ingredient_id = recipe_ingredient.ingredient.id
-                quantity = float(recipe_ingredient.quantity) * ratio
-                unit = recipe_ingredient.unit
-                
-                if ingredient_id not in ingredients_map:
-                    ingredients_map[ingredient_id] = {
-                        'quantity': 0,
-                        'unit': unit,
-                    }
-                
-                if ingredients_map[ingredient_id]['unit'] == unit:
-                    ingredients_map[ingredient_id]['quantity'] += quantity
-                else:
-                    ingredients_map[ingredient_id]['quantity'] += quantity
+        # Seule la liste des ingrédients distincts compte ici (les quantités sont calculées
+        # par with_quantities) : DISTINCT en SQL plutôt qu'une agrégation en Python
+        ingredient_ids = RecipeIngredient.objects.filter(
+            recipe__batches__shopping_lists=shopping_list
+        ).order_by().values_list('ingredient_id', flat=True).distinct()
         
         created_items = []
-        items_to_create = []
-        
-        existing_items = {
-            item.ingredient_id: item 
-            for item in shopping_list.items.select_related('ingredient__category').all()
-        }
         
-        for ingredient_id, data in ingredients_map.items():
-            if ingredient_id in existing_items:
-                continue
-            items_to_create.append(
-                ShoppingListItem(
-                    shopping_list=shopping_list,
-                    ingredient_id=ingredient_id,
-                    status='to_buy',
-                    pantry_quantity=0,
-                )
-            )
-        
-        if items_to_create:
-            ShoppingListItem.objects.bulk_create(items_to_create)
-        
-        all_items = shopping_list.items.select_related('ingredient__category').all()
-        created_items = [ShoppingListItemSerializer(item).data for item in all_items]
+        # Lecture des items existants et insertion des manquants dans une même transaction :
+        # les INSERT par lots sont validés en un seul commit
+        try:
+            with transaction.atomic():
+                existing_items = {
+                    item.ingredient_id: item 
+                    for item in shopping_list.items.select_related('ingredient__category').all()
+                }
+                
+                # Ingrédients manquants chargés en une requête (avec leur catégorie, pour la sérialisation)
+                missing_ingredients = Ingredient.objects.select_related('category').filter(
+                    id__in=ingredient_ids
+                ).exclude(id__in=list(existing_items))
+                items_to_create = [
+                    ShoppingListItem(
+                        shopping_list=shopping_list,
+                        ingredient=ingredient,
+                        status='to_buy',
+                        pantry_quantity=0,
+                    )
+                    for ingredient in missing_ingredients
+                ]
+                
+                if items_to_create:
+                    # Sans ignore_conflicts, Postgres renvoie les ids (RETURNING) des items créés
+                    created_items = ShoppingListItem.objects.bulk_create(items_to_create, batch_size=500)
+        except IntegrityError:
+            # Génération concurrente : l'autre appel a inséré une partie des mêmes ingrédients
+            # (unique_together shopping_list/ingredient). Ses items font foi : relecture complète
+            all_items = shopping_list.items.select_related('ingredient__category').all()
+            return Response(ShoppingListItemSerializer(all_items, many=True).data, status=status.HTTP_200_OK)
         
-        return Response(created_items, status=status.HTTP_200_OK)
+        # Pas de relecture : items créés (les plus récents) puis existants, déjà triés par -updated_at
+        all_items = created_items + list(existing_items.values())
+        return Response(ShoppingListItemSerializer(all_items, many=True).data, status=status.HTTP_200_OK)
 
 
 class ShoppingListItemViewSet(viewsets.ModelViewSet):
@@ -3050,7 +3118,6 @@ class ShoppingListItemViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filtrer par shopping list de l'utilisateur"""
-        from django.db.models import Prefetch
         
         shopping_list_id = self.request.query_params.get('shopping_list_id')
         
@@ -3084,111 +3151,115 @@ class ShoppingListItemViewSet(viewsets.ModelViewSet):
             'shopping_list'
         ).order_by('-updated_at')
     
+    def _aggregate_ingredients(self, shopping_list, ratios):
+        """
+        Quantités par (ingrédient, unité) : SUM(quantité × ratio du batch) calculé en SQL,
+        le ratio de chaque batch étant injecté via Case/When. Un ingrédient présent dans
+        plusieurs unités (g et cuillères, par exemple) donne une entrée par unité.
+        """
+        if not ratios:
+            return {}
+        ratio_whens = [When(recipe__batches__id=batch_id, then=Value(ratio)) for batch_id, ratio in ratios.items()]
+        rows = RecipeIngredient.objects.filter(
+            recipe__batches__shopping_lists=shopping_list,
+            recipe__batches__id__in=list(ratios),
+        ).order_by().values(
+            'ingredient_id', 'ingredient__name', 'ingredient__category_id', 'ingredient__category__name', 'unit',
+        ).annotate(
+            total=Sum(
+                Cast('quantity', FloatField()) * Case(*ratio_whens, default=Value(1.0), output_field=FloatField()),
+                output_field=FloatField(),
+            )
+        ).values_list(
+            'ingredient_id', 'ingredient__name', 'ingredient__category_id', 'ingredient__category__name', 'unit', 'total',
+        )
+        
+        # Le GROUP BY garantit une ligne par clé (ingrédient, unité)
+        return {
+            (ingredient_id, unit): {
+                'id': ingredient_id,
+                'name': name,
+                'quantity': total or 0,
+                'unit': unit,
+                'category': {
+                    'id': category_id,
+                    'name': category_name,
+                } if category_id else {'id': None, 'name': 'Autres'},
+                'item': None,
+            }
+            for ingredient_id, name, category_id, category_name, unit, total in rows
+        }
+    
     @action(detail=False, methods=['get'])
     def with_quantities(self, request):
         """Retourne les ingrédients avec leurs quantités calculées depuis les recipe_batches"""
-        from django.db.models import Prefetch
-        
         shopping_list_id = request.query_params.get('shopping_list_id')
         
         if not shopping_list_id:
             return Response({'error': 'shopping_list_id required'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            # Optimisation maximale : précharger toutes les relations en une seule requête
-            from .models import MealPlan, MealInvitation, MealPlanRecipeBatch
-            shopping_list = ShoppingList.objects.prefetch_related(
-                Prefetch(
-                    'recipe_batches',
-                    queryset=RecipeBatch.objects.select_related('recipe').prefetch_related(
-                        Prefetch(
-                            'recipe__recipe_ingredients',
-                            queryset=RecipeIngredient.objects.select_related('ingredient__category')
-                        ),
-                        Prefetch(
-                            'meal_plan_recipe_batches',
-                            queryset=MealPlanRecipeBatch.objects.select_related('meal_plan').prefetch_related(
-                                Prefetch(
-                                    'meal_plan__invitations',
-                                    queryset=MealInvitation.objects.select_related('invitee')
-                                )
-                            )
-                        )
-                    )
-                ),
-                Prefetch(
-                    'items',
-                    queryset=ShoppingListItem.objects.select_related('ingredient__category')
-                )
-            ).get(id=shopping_list_id, user=request.user)
+            shopping_list = ShoppingList.objects.only('id').get(id=shopping_list_id, user=request.user)
         except ShoppingList.DoesNotExist:
             return Response({'error': 'Shopping list not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Agréger les ingrédients depuis les recipe_batches
-        ingredients_map = {}
-        
-        for batch in shopping_list.recipe_batches.all():
-            recipe = batch.recipe
-            if not recipe:
-                continue
-            
-            # Calculer total_servings_batch en sommant les servings de tous les meal plans du batch
-            total_servings_batch = 0
-            all_meal_plans = MealPlan.objects.filter(
-                meal_plan_recipe_batches__recipe_batch=batch
-            ).prefetch_related(
-                Prefetch('invitations', queryset=MealInvitation.objects.select_related('invitee'))
-            ).distinct()
-            
-            for mp in all_meal_plans:
-                total_servings_batch += calculate_meal_plan_servings(mp)
-            
+        # Ratio de portions par batch : total_servings_batch (agrégats SQL, en cache par batch)
+        # rapporté aux portions de la recette
+        batches = list(RecipeBatch.objects.filter(
+            shopping_lists=shopping_list, recipe__isnull=False
+        ).order_by().values_list('id', 'recipe__servings', 'recipe__updated_at'))
+        servings_by_batch = calculate_batches_servings([batch_id for batch_id, _, _ in batches])
+        ratios = {}
+        for batch_id, recipe_servings, _ in batches:
             # Utiliser total_servings_batch ou fallback sur servings de la recette
-            servings = total_servings_batch if total_servings_batch > 0 else (recipe.servings or 1)
-            base_servings = recipe.servings or 1
-            ratio = servings / base_servings if base_servings else 1
-            
-            # Parcourir les ingrédients de la recette
-            for recipe_ingredient in recipe.recipe_ingredients.all():
-                ingredient = recipe_ingredient.ingredient
-                ingredient_id = ingredient.id
-                quantity = float(recipe_ingredient.quantity) * ratio
-                unit = recipe_ingredient.unit
-                
-                if ingredient_id not in ingredients_map:
-                    ingredients_map[ingredient_id] = {
-                        'id': ingredient_id,
-                        'name': ingredient.name,
-                        'quantity': 0,
-                        'unit': unit,
-                        'category': {
-                            'id': ingredient.category.id if ingredient.category else None,
-                            'name': ingredient.category.name if ingredient.category else 'Autres',
-                        } if ingredient.category else {'id': None, 'name': 'Autres'},
-                        'item': None,
-                    }
-                
-                if ingredients_map[ingredient_id]['unit'] == unit:
-                    ingredients_map[ingredient_id]['quantity'] += quantity
-                else:
-                    # Unités différentes : additionner quand même (pour l'instant)
-                    ingredients_map[ingredient_id]['quantity'] += quantity
-        
-        # Enrichir avec les items existants (statut, pantry_quantity)
-        for item in shopping_list.items.all():
-            ingredient_id = item.ingredient.id
-            if ingredient_id in ingredients_map:
-                ingredients_map[ingredient_id]['item'] = {
-                    'id': item.id,
-                    'status': item.status,
-                    'pantry_quantity': float(item.pantry_quantity) if item.pantry_quantity else 0,
-                    'pantry_unit': item.pantry_unit or '',
+            total_servings_batch = servings_by_batch.get(batch_id, 0)
+            servings = total_servings_batch if total_servings_batch > 0 else (recipe_servings or 1)
+            base_servings = recipe_servings or 1
+            ratios[batch_id] = servings / base_servings
+        
+        # Version des quantités : batches de la liste, leurs ratios et la date de mise à jour
+        # des recettes. Toute modification change la clé, l'ancienne entrée expire seule.
+        probe = sorted(
+            (batch_id, ratios[batch_id], recipe_updated_at.timestamp() if recipe_updated_at else 0)
+            for batch_id, _, recipe_updated_at in batches
+        )
+        digest = hashlib.md5(repr(probe).encode('utf-8')).hexdigest()
+        key = f"sl:qty:v2:{shopping_list.id}:{digest}"
+        ingredients_map = cache.get(key)
+        if ingredients_map is None:
+            ingredients_map = self._aggregate_ingredients(shopping_list, ratios)
+            cache.set(key, ingredients_map, SHOPPING_LIST_QUANTITIES_CACHE_TTL)
+        
+        # Enrichir avec les items existants (statut, pantry_quantity) : un item par
+        # ingrédient, partagé par toutes ses unités
+        entries_by_ingredient = defaultdict(list)
+        for (ingredient_id, _), entry in ingredients_map.items():
+            entries_by_ingredient[ingredient_id].append(entry)
+        items = shopping_list.items.order_by().values_list('id', 'ingredient_id', 'status', 'pantry_quantity', 'pantry_unit')
+        for item_id, ingredient_id, item_status, pantry_quantity, pantry_unit in items:
+            entries = entries_by_ingredient.get(ingredient_id)
+            if entries:
+                item = {
+                    'id': item_id,
+                    'status': item_status,
+                    'pantry_quantity': float(pantry_quantity) if pantry_quantity else 0,
+                    'pantry_unit': pantry_unit or '',
                 }
+                for entry in entries:
+                    entry['item'] = item
+        
+        # Streamer la liste entrée par entrée plutôt que de matérialiser liste + chaîne JSON
+        encoder = JSONEncoder()
         
-        # Convertir en liste
-        ingredients_list = list(ingredients_map.values())
+        def generate():
+            yield '['
+            separator = ''
+            for entry in ingredients_map.values():
+                yield separator + encoder.encode(entry)
+                separator = ','
+            yield ']'
         
-        return Response(ingredients_list, status=status.HTTP_200_OK)
+        return StreamingHttpResponse(generate(), content_type='application/json')
 
 
 class CollectionViewSet(viewsets.ModelViewSet):
@@ -3213,6 +3284,8 @@ class CollectionViewSet(viewsets.ModelViewSet):
         owner_id = self.request.query_params.get('owner')
         is_public_param = self.request.query_params.get('is_public')
         
+        visible = self._visible_filter(user)
+        
         if owner_id:
             try:
                 owner_id_int = int(owner_id)
@@ -3223,32 +3296,51 @@ class CollectionViewSet(viewsets.ModelViewSet):
                         is_public=True
                     )
                 else:
-                    queryset = Collection.objects.filter(
-                        Q(owner_id=owner_id_int, is_public=True) | 
-                        Q(owner_id=owner_id_int, owner=user) |
-                        Q(owner_id=owner_id_int, members__user=user)
-                    ).distinct()
+                    queryset = Collection.objects.filter(visible, owner_id=owner_id_int)
             except (ValueError, TypeError):
-                queryset = Collection.objects.filter(
-                    Q(is_public=True) | Q(owner=user) | Q(members__user=user)
-                ).distinct()
+                queryset = Collection.objects.filter(visible)
         else:
-            queryset = Collection.objects.filter(
-                Q(is_public=True) | Q(owner=user) | Q(members__user=user)
-            ).distinct()
-        
-        # Précharger les relations
-        queryset = queryset.select_related('owner').prefetch_related(
-            'collection_recipes__recipe',
-            'members__user'
-        )
+            queryset = Collection.objects.filter(visible)
         
-        queryset = queryset.annotate(
+        queryset = queryset.select_related('owner').annotate(
+            total_recipes=Count('collection_recipes'),
             last_activity=Max('collection_recipes__added_at')
         )
         
+        # La liste n'affiche que des compteurs : pas de prefetch de toutes les recettes
+        # de toutes les collections, réservé au détail
+        if self.action != 'list':
+            queryset = queryset.prefetch_related(
+                'collection_recipes__recipe',
+                'members__user'
+            )
+        
         return queryset.order_by('-last_activity', '-updated_at')
     
+    @staticmethod
+    def _visible_filter(user):
+        """Collections visibles : publiques, possédées, ou dont l'utilisateur est membre"""
+        # Appartenance en sous-requête (id IN ...) : pas de jointure sur members, donc ni
+        # multiplication des lignes ni DISTINCT sur la ligne complète
+        return Q(is_public=True) | Q(owner=user) | Q(
+            id__in=CollectionMember.objects.filter(user=user).values('collection_id')
+        )
+    
+    def _get_collection_meta(self, pk):
+        """
+        Champs nécessaires aux contrôles de droits des mutations, en une requête étroite
+        (sans annotations ni prefetch) ; None si la collection n'est pas visible.
+        """
+        user = self.request.user
+        user_memberships = CollectionMember.objects.filter(collection=OuterRef('pk'), user=user)
+        return Collection.objects.filter(self._visible_filter(user), pk=pk).annotate(
+            is_current_member=Exists(user_memberships),
+            is_current_collaborator=Exists(user_memberships.filter(role='collaborator'))
+        ).values(
+            'id', 'owner_id', 'is_public', 'is_collaborative',
+            'is_current_member', 'is_current_collaborator'
+        ).first()
+    
     def perform_create(self, serializer):
         """Créer une collection avec l'utilisateur connecté comme owner"""
         # Le serializer.create() gère déjà la création du CollectionMember
@@ -3273,18 +3365,29 @@ class CollectionViewSet(viewsets.ModelViewSet):
             )
         instance.delete()
     
+    def _mutation_response(self, payload):
+        """Réponse légère après une mutation ; ?full=1 renvoie la collection sérialisée."""
+        if self.request.query_params.get('full') == '1':
+            payload = self.get_serializer(self.get_object()).data
+        return Response(payload, status=status.HTTP_200_OK)
+    
     @action(detail=True, methods=['post'])
     def add_recipe(self, request, pk=None):
         """Ajouter une recette à la collection"""
-        collection = self.get_object()
+        meta = self._get_collection_meta(pk)
+        if meta is None:
+            return Response(
+                {'error': 'Collection non trouvée'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         user = request.user
         
         # Vérifier les permissions
-        is_owner = collection.owner == user
-        is_member = collection.members.filter(user=user).exists()
-        is_public = collection.is_public
+        is_owner = meta['owner_id'] == user.id
+        is_member = meta['is_current_member']
+        is_public = meta['is_public']
         
-        if not (is_owner or (is_member and collection.is_collaborative) or is_public):
+        if not (is_owner or (is_member and meta['is_collaborative']) or is_public):
             return Response(
                 {'error': 'Vous n\'avez pas la permission d\'ajouter des recettes à cette collection'},
                 status=status.HTTP_403_FORBIDDEN
@@ -3297,40 +3400,45 @@ class CollectionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            recipe = Recipe.objects.get(id=recipe_id)
-        except Recipe.DoesNotExist:
+        # Existence seulement : la recette n'est pas chargée, seul son id sert à la création
+        if not Recipe.objects.filter(id=recipe_id).exists():
             return Response(
                 {'error': 'Recette non trouvée'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Vérifier si la recette est déjà dans la collection
-        if CollectionRecipe.objects.filter(collection=collection, recipe=recipe).exists():
+        # Ajouter la recette : l'unicité (collection, recipe) est garantie par la base
+        collection_recipe, created = CollectionRecipe.objects.get_or_create(
+            collection_id=meta['id'],
+            recipe_id=recipe_id,
+            defaults={'added_by': user}
+        )
+        if not created:
             return Response(
                 {'error': 'Cette recette est déjà dans la collection'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Ajouter la recette
-        CollectionRecipe.objects.create(
-            collection=collection,
-            recipe=recipe,
-            added_by=user
-        )
-        
-        serializer = self.get_serializer(collection)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self._mutation_response({
+            'id': collection_recipe.id,
+            'recipe_id': collection_recipe.recipe_id,
+            'total_recipes': CollectionRecipe.objects.filter(collection_id=meta['id']).count(),
+        })
     
     @action(detail=True, methods=['post'])
     def remove_recipe(self, request, pk=None):
         """Retirer une recette de la collection"""
-        collection = self.get_object()
+        meta = self._get_collection_meta(pk)
+        if meta is None:
+            return Response(
+                {'error': 'Collection non trouvée'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         user = request.user
         
         # Vérifier les permissions (owner ou collaborateur)
-        is_owner = collection.owner == user
-        is_collaborator = collection.members.filter(user=user, role='collaborator').exists()
+        is_owner = meta['owner_id'] == user.id
+        is_collaborator = meta['is_current_collaborator']
         
         if not (is_owner or is_collaborator):
             return Response(
@@ -3345,36 +3453,42 @@ class CollectionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            collection_recipe = CollectionRecipe.objects.get(
-                collection=collection,
-                recipe_id=recipe_id
-            )
-            collection_recipe.delete()
-        except CollectionRecipe.DoesNotExist:
+        # Un seul DELETE : le nombre de lignes supprimées tient lieu de contrôle d'existence
+        deleted_count, _ = CollectionRecipe.objects.filter(
+            collection_id=meta['id'],
+            recipe_id=recipe_id
+        ).delete()
+        if not deleted_count:
             return Response(
                 {'error': 'Cette recette n\'est pas dans la collection'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        serializer = self.get_serializer(collection)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self._mutation_response({
+            'recipe_id': int(recipe_id),
+            'total_recipes': CollectionRecipe.objects.filter(collection_id=meta['id']).count(),
+        })
     
     @action(detail=True, methods=['post'])
     def add_member(self, request, pk=None):
         """Ajouter un membre à la collection (si collaborative)"""
-        collection = self.get_object()
+        meta = self._get_collection_meta(pk)
+        if meta is None:
+            return Response(
+                {'error': 'Collection non trouvée'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         user = request.user
         
         # Vérifier que l'utilisateur est le propriétaire
-        if collection.owner != user:
+        if meta['owner_id'] != user.id:
             return Response(
                 {'error': 'Seul le propriétaire peut ajouter des membres'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
         # Vérifier que la collection est collaborative
-        if not collection.is_collaborative:
+        if not meta['is_collaborative']:
             return Response(
                 {'error': 'Cette collection n\'est pas collaborative'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -3396,30 +3510,38 @@ class CollectionViewSet(viewsets.ModelViewSet):
             )
         
         # Vérifier si l'utilisateur est déjà membre
-        if CollectionMember.objects.filter(collection=collection, user=member_user).exists():
+        if CollectionMember.objects.filter(collection_id=meta['id'], user=member_user).exists():
             return Response(
                 {'error': 'Cet utilisateur est déjà membre de la collection'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         # Ajouter le membre
-        CollectionMember.objects.create(
-            collection=collection,
+        member = CollectionMember.objects.create(
+            collection_id=meta['id'],
             user=member_user,
             role='collaborator'
         )
         
-        serializer = self.get_serializer(collection)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self._mutation_response({
+            'id': member.id,
+            'user_id': member_user.id,
+            'total_members': CollectionMember.objects.filter(collection_id=meta['id']).count(),
+        })
     
     @action(detail=True, methods=['post'])
     def remove_member(self, request, pk=None):
         """Retirer un membre de la collection"""
-        collection = self.get_object()
+        meta = self._get_collection_meta(pk)
+        if meta is None:
+            return Response(
+                {'error': 'Collection non trouvée'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         user = request.user
         
         # Vérifier que l'utilisateur est le propriétaire
-        if collection.owner != user:
+        if meta['owner_id'] != user.id:
             return Response(
                 {'error': 'Seul le propriétaire peut retirer des membres'},
                 status=status.HTTP_403_FORBIDDEN
@@ -3434,7 +3556,7 @@ class CollectionViewSet(viewsets.ModelViewSet):
         
         try:
             member = CollectionMember.objects.get(
-                collection=collection,
+                collection_id=meta['id'],
                 user_id=user_id
             )
             # Ne pas permettre de retirer le propriétaire
@@ -3450,8 +3572,10 @@ class CollectionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        serializer = self.get_serializer(collection)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self._mutation_response({
+            'user_id': member.user_id,
+            'total_members': CollectionMember.objects.filter(collection_id=meta['id']).count(),
+        })
     
     @action(detail=False, methods=['get'])
     def my_collections(self, request):
@@ -3500,12 +3624,15 @@ class CollectionViewSet(viewsets.ModelViewSet):
     def suggestions(self, request, pk=None):
         """Proposer des recettes similaires à ajouter dans la collection"""
         collection = self.get_object()
-        existing_ids = collection.collection_recipes.values_list('recipe_id', flat=True)
+        # NOT EXISTS : anti-jointure sur l'index (collection, recipe) plutôt qu'un NOT IN
+        already_in_collection = CollectionRecipe.objects.filter(
+            collection_id=collection.id,
+            recipe=OuterRef('pk')
+        )
         
         queryset = Recipe.objects.filter(
-            Q(is_public=True) | Q(created_by=request.user)
-        ).exclude(
-            id__in=existing_ids
+            Q(is_public=True) | Q(created_by=request.user),
+            ~Exists(already_in_collection)
         ).order_by('-created_at')
         
         page = self.paginate_queryset(queryset)
@@ -1,7 +1,10 @@
+import logging
 from time import perf_counter
 from django.db import connection, reset_queries
 from django.conf import settings
 
+logger = logging.getLogger(__name__)
+
 
 class TimingMiddleware:
     """
@@ -35,3 +38,25 @@ class TimingMiddleware:
             return response
         return self.get_response(request)
 
+
+class NotificationBufferMiddleware:
+    """
+    Regroupe les notifications créées pendant une requête (accounts.utils.queue_notification)
+    et les insère en un seul bulk_create, uniquement si la réponse est un succès.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        from accounts.utils import flush_notifications
+        
+        request._notification_buffer = []
+        response = self.get_response(request)
+        if response.status_code < 400:
+            # La mutation est déjà validée : un échec d'insertion des notifications ne doit
+            # pas transformer la réponse en 500 (le client risquerait de la rejouer)
+            try:
+                flush_notifications(request)
+            except Exception:
+                logger.exception("Failed to flush buffered notifications for %s", request.path)
+        return response
@@ -5,7 +5,9 @@ Django settings for savr_back project.
 from pathlib import Path
 from decouple import config
 from datetime import timedelta
+import threading
 import boto3
+from botocore.config import Config as BotoConfig
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -80,6 +82,7 @@ MIDDLEWARE = [
     'savr_back.middleware.TimingMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'savr_back.middleware.NotificationBufferMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -244,6 +247,24 @@ CELERY_TASK_TIME_LIMIT = 60 * 10  # 10 minutes
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
+
+# Cache : Redis partagé entre workers si CACHE_URL est défini, sinon mémoire locale (dev/tests).
+# Les invalidations par version de clé doivent atteindre tous les workers gunicorn :
+# en production, CACHE_URL est obligatoire (défini dans docker-compose).
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
     
 
 
@@ -281,24 +302,29 @@ def build_s3_url(image_path):
 
 
 _S3_CLIENT = None
+_S3_LOCK = threading.Lock()
 
 
 def build_s3_client():
-    """Créer un client S3/MinIO partagé."""
+    """Créer un client S3/MinIO partagé (thread-safe, pool de connexions réutilisé)."""
     global _S3_CLIENT
     if _S3_CLIENT is not None:
         return _S3_CLIENT
 
-    config_kwargs = {
-        'aws_access_key_id': AWS_ACCESS_KEY_ID,
-        'aws_secret_access_key': AWS_SECRET_ACCESS_KEY,
-        'region_name': AWS_S3_REGION_NAME,
-    }
-    if AWS_ENDPOINT:
-        config_kwargs['endpoint_url'] = AWS_ENDPOINT
-        if AWS_ENDPOINT.startswith('http://'):
-            config_kwargs['use_ssl'] = False
-    _S3_CLIENT = boto3.client('s3', **config_kwargs)
+    with _S3_LOCK:
+        if _S3_CLIENT is None:
+            config_kwargs = {
+                'aws_access_key_id': AWS_ACCESS_KEY_ID,
+                'aws_secret_access_key': AWS_SECRET_ACCESS_KEY,
+                'region_name': AWS_S3_REGION_NAME,
+                # Pool plus large pour que les rafales d'upload/suppression ne se sérialisent pas
+                'config': BotoConfig(max_pool_connections=50, retries={'max_attempts': 2}),
+            }
+            if AWS_ENDPOINT:
+                config_kwargs['endpoint_url'] = AWS_ENDPOINT
+                if AWS_ENDPOINT.startswith('http://'):
+                    config_kwargs['use_ssl'] = False
+            _S3_CLIENT = boto3.client('s3', **config_kwargs)
     return _S3_CLIENT
 
 